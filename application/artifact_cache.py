@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from application import artifacts, conf, data_downloader, logger
+
+CachedArtifact = namedtuple("CachedArtifact", ["artifact_id", "created_at", "value"])
+
+
+class ArtifactCache:
+    """
+    Artifacts of the GitHub workflows, downloaded and parsed once for all web sessions.
+
+    The artifact index is refreshed at most once per refresh interval. An artifact is
+    downloaded and parsed only when the id of the last artifact of its name changes,
+    and its parsed value is kept in memory until then. If listing or downloading
+    fails, the last parsed value is served. Artifacts can also be prefetched in
+    background threads, before they are needed.
+    """
+
+    def __init__(
+            self, directory: str, refresh_interval: float = 600.0, index: Optional[artifacts.ArtifactIndex] = None
+    ):
+        """
+        Args:
+            directory: Directory of the downloaded artifact archives.
+            refresh_interval: Minimum number of seconds between two refreshes of the artifact index.
+            index: Artifact index (the index of the configured repository by default).
+        """
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.index = index or artifacts.get_artifact_index()
+        self._listed = False
+        self._listed_at = None
+        self._entries: Dict[str, CachedArtifact] = {}
+        self._listing_lock = threading.Lock()
+        self._name_locks = defaultdict(threading.Lock)
+        self._prefetched_at = None
+        self._prefetch_lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Refresh the artifact index if the refresh interval elapsed (or if forced)."""
+        with self._listing_lock:
+            if not force and self._listed_at is not None and time.monotonic() - self._listed_at < self.refresh_interval:
+                return
+            try:
+                self.index.refresh()
+                self._listed = True
+            except Exception as e:
+                if not self._listed:
+                    raise
+                logger.warning(f"Failed to list artifacts, using the previous listing: {e}")
+            # Also after a failure, not to query the API on every page load
+            self._listed_at = time.monotonic()
+
+    def get(self, name: str, parse: Callable[[str], Any]) -> Any:
+        """
+        Get the parsed content of the last artifact with the given name.
+
+        Args:
+            name: Name of the artifact.
+            parse: Function parsing the downloaded archive, from its path.
+
+        Returns:
+            The parsed content (shared by all sessions, must not be modified).
+
+        Raises:
+            IOError: If no artifact was ever found with this name.
+        """
+        self.refresh()
+        artifact = self.index.get_latest(name)
+        with self._name_locks[name]:
+            entry = self._entries.get(name)
+            if entry is not None and (artifact is None or entry.artifact_id == artifact["id"]):
+                return entry.value
+            if artifact is None:
+                raise IOError(f"No artifact found with name {name}")
+            try:
+                path = self._download(name, artifact)
+                value = parse(path)
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning(f"Failed to update artifact {name}, using artifact {entry.artifact_id}: {e}")
+                return entry.value
+            self._entries[name] = CachedArtifact(artifact["id"], artifact["created_at"], value)
+            return value
+
+    def prefetch(self, parsers: Dict[str, Callable[[str], Any]]) -> None:
+        """
+        Get artifacts in background threads, one per artifact, so that they are in memory when needed.
+
+        Prefetching starts at most once per refresh interval, and returns without waiting.
+        Failures are only logged, as getting the artifact again raises them.
+
+        Args:
+            parsers: Function parsing the downloaded archive of each artifact name.
+        """
+        with self._prefetch_lock:
+            if self._prefetched_at is not None and time.monotonic() - self._prefetched_at < self.refresh_interval:
+                return
+            self._prefetched_at = time.monotonic()
+        for name, parse in parsers.items():
+            threading.Thread(
+                target=self._prefetch_artifact, args=(name, parse), name=f"prefetch-{name}", daemon=True
+            ).start()
+
+    def _prefetch_artifact(self, name: str, parse: Callable[[str], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            self.get(name, parse)
+        except Exception as e:
+            logger.warning(f"Failed to prefetch artifact {name}: {e}")
+            return
+        logger.debug(f"Artifact {name} prefetched in {time.perf_counter() - start:.2f}s")
+
+    def get_date(self, name: str) -> Optional[datetime]:
+        """Return the creation date of the cached artifact with the given name, if any."""
+        entry = self._entries.get(name)
+        return entry.created_at if entry is not None else None
+
+    def _download(self, name: str, artifact: dict) -> str:
+        """Download the archive of an artifact, unless already downloaded, and remove its previous versions."""
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = f"{name}-"
+        path = os.path.join(self.directory, f"{prefix}{artifact['id']}.zip")
+        if not os.path.exists(path):
+            logger.debug(f"Downloading artifact {name} from {artifact['url']}")
+            download_path = f"{path}.part"
+            data_downloader.download_data_from_url_to_file(
+                artifact["url"], download_path, auth=artifacts.get_github_auth()
+            )
+            os.replace(download_path, path)
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith(prefix) and os.path.join(self.directory, file_name) != path:
+                os.remove(os.path.join(self.directory, file_name))
+        return path
+
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Return the artifact cache of the process, shared by all web sessions."""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            cache_conf = conf.web.artifact_cache
+            _artifact_cache = ArtifactCache(cache_conf.path, refresh_interval=cache_conf.refresh_seconds)
+        return _artifact_cache
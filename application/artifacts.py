@@ -1,45 +1,207 @@
 import os
-import requests
+import threading
 from datetime import datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
 from application import conf, logger
 
 GITHUB_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+DEFAULT_GITHUB_API_URL = "https://api.github.com"
 MAX_ARTIFACTS_PER_PAGE = 100
+REQUEST_TIMEOUT = 30
 
 
-def get_artifacts() -> dict:
+class ArtifactIndex:
     """
-    Fetch artifacts from the specified GitHub repository.
-
-    Returns:
-        dict: Artifacts information.
+    Index of the last available artifact of each name of a GitHub repository.
+
+    Artifacts are listed newest first by the API. A refresh requests the first page
+    with the ETag of its previous response (`If-None-Match`), so that an unchanged
+    listing costs a single 304 response. Otherwise, pages are read until a page holds
+    no new artifact, and only the names of new or updated artifacts are re-indexed.
+    Lookups are dictionary accesses, expired artifacts being skipped from their
+    expiration date without listing again.
     """
-    github_repo = conf.web.github_repo
-    url = f"https://api.github.com/repos/{github_repo}/actions/artifacts?per_page={MAX_ARTIFACTS_PER_PAGE}"
-    auth = get_github_auth()
-    return _load_json_from_url(url, auth)
 
+    def __init__(
+            self,
+            github_repo: str,
+            api_url: str = DEFAULT_GITHUB_API_URL,
+            auth=None,
+            session: Optional[requests.Session] = None,
+            per_page: int = MAX_ARTIFACTS_PER_PAGE
+    ):
+        """
+        Args:
+            github_repo: Repository, as owner/name.
+            api_url: Base URL of the GitHub API.
+            auth: Authentication tuple.
+            session: HTTP session (a pooled session by default).
+            per_page: Number of artifacts requested per page.
+        """
+        self.url = f"{api_url.rstrip('/')}/repos/{github_repo}/actions/artifacts"
+        self.auth = auth
+        self.session = session or get_session()
+        self.per_page = per_page
+        self._artifacts_by_name: Dict[str, Dict[int, dict]] = {}
+        self._latest: Dict[str, Optional[dict]] = {}
+        self._first_page_etag = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """
+        Update the index from the artifacts created, expired or deleted since the last refresh.
+
+        Returns:
+            bool: Whether the listing changed.
+        """
+        with self._lock:
+            response = self._get_page(1, etag=self._first_page_etag)
+            if response.status_code == 304:
+                logger.debug("Artifacts listing unchanged")
+                return False
+            first_page_etag = response.headers.get("ETag")
+            first_page = response.json()
+            total_count = first_page.get("total_count", 0)
+            page_artifacts = first_page.get("artifacts", [])
+            listed = {}
+            updated_names = set()
+            page = 1
+            while True:
+                new_artifacts = self._merge(page_artifacts, updated_names)
+                listed.update((artifact["id"], artifact["created_at"]) for artifact in page_artifacts)
+                # Listing is newest first: once a page holds no new artifact, the next ones
+                # are already known
+                if not new_artifacts or len(page_artifacts) < self.per_page or page * self.per_page >= total_count:
+                    break
+                page += 1
+                page_artifacts = self._get_page(page).json().get("artifacts", [])
+            whole_listing = len(page_artifacts) < self.per_page or page * self.per_page >= total_count
+            self._remove_unlisted(listed, updated_names, whole_listing)
+            for name in updated_names:
+                self._latest[name] = self._find_latest(name)
+            # Only once the index is up to date, so that a failed refresh is retried
+            self._first_page_etag = first_page_etag
+            logger.debug(f"Artifacts listing: {page} page(s) read, {len(updated_names)} name(s) updated")
+            return True
+
+    def get_latest(self, artifact_name: str) -> Optional[dict]:
+        """
+        Return the last available artifact with the given name.
+
+        Returns:
+            dict: The id, name, creation date and URL of the artifact, or None if there is none.
+        """
+        latest = self._latest.get(artifact_name)
+        if latest is not None and self._is_expired(latest):
+            with self._lock:
+                latest = self._latest[artifact_name] = self._find_latest(artifact_name)
+        return latest
+
+    def _get_page(self, page: int, etag: Optional[str] = None) -> requests.Response:
+        headers = {"Accept": "application/vnd.github+json"}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.session.get(
+            self.url,
+            params={"per_page": self.per_page, "page": page},
+            headers=headers,
+            auth=self.auth,
+            timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code == 403:
+            raise Exception(f"Error 403 when requesting {response.url} : {response.content}")
+        response.raise_for_status()
+        return response
+
+    def _merge(self, page_artifacts: list, updated_names: set) -> int:
+        """Merge listed artifacts into the index, returning the number of new ones."""
+        new_artifacts = 0
+        for raw_artifact in page_artifacts:
+            artifact = _parse_artifact(raw_artifact)
+            known_artifacts = self._artifacts_by_name.setdefault(artifact["name"], {})
+            previous = known_artifacts.get(artifact["id"])
+            if previous is None:
+                new_artifacts += 1
+            if previous != artifact:
+                known_artifacts[artifact["id"]] = artifact
+                updated_names.add(artifact["name"])
+        return new_artifacts
+
+    def _remove_unlisted(self, listed: dict, updated_names: set, whole_listing: bool) -> None:
+        """Forget deleted artifacts: those missing from the read pages, newer than their last artifact."""
+        oldest_listed = min(
+            (datetime.strptime(created_at, GITHUB_DATE_FORMAT) for created_at in listed.values()), default=None
+        )
+        for name, known_artifacts in self._artifacts_by_name.items():
+            unlisted_ids = [
+                artifact_id for artifact_id, artifact in known_artifacts.items()
+                if artifact_id not in listed
+                and (whole_listing or oldest_listed is not None and artifact["created_at"] > oldest_listed)
+            ]
+            for artifact_id in unlisted_ids:
+                del known_artifacts[artifact_id]
+            if unlisted_ids:
+                updated_names.add(name)
+
+    def _find_latest(self, artifact_name: str) -> Optional[dict]:
+        available = [
+            artifact for artifact in self._artifacts_by_name.get(artifact_name, {}).values()
+            if not self._is_expired(artifact)
+        ]
+        return max(available, key=lambda artifact: artifact["created_at"]) if available else None
+
+    @staticmethod
+    def _is_expired(artifact: dict) -> bool:
+        return artifact["expired"] or (
+            artifact["expires_at"] is not None and artifact["expires_at"] <= datetime.utcnow()
+        )
+
+
+def _parse_artifact(artifact: dict) -> dict:
+    """Keep the fields of an artifact used by the index, with parsed dates."""
+    expires_at = artifact.get("expires_at")
+    return {
+        "id": artifact.get("id"),
+        "name": artifact.get("name"),
+        "created_at": datetime.strptime(artifact.get("created_at"), GITHUB_DATE_FORMAT),
+        "expires_at": datetime.strptime(expires_at, GITHUB_DATE_FORMAT) if expires_at else None,
+        "expired": bool(artifact.get("expired")),
+        "url": artifact.get("archive_download_url")
+    }
 
-def _load_json_from_url(url: str, auth=None) -> dict:
-    """
-    Fetch a JSON object from a given URL.
 
-    Args:
-        url: Target URL.
-        auth: Authentication tuple.
+_session = None
+_session_lock = threading.Lock()
+_artifact_index = None
+_artifact_index_lock = threading.Lock()
 
-    Returns:
-        dict: Parsed JSON content.
 
-    Raises:
-        Exception: If the request returns a 403 Forbidden status.
-    """
-    response = requests.get(url, auth=auth)
-    response.raise_for_status()  # Will raise an HTTPError if the HTTP request returned an unsuccessful status code
+def get_session() -> requests.Session:
+    """Return the HTTP session of the process, reusing connections to the GitHub API."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return _session
 
-    if response.status_code == 403:
-        raise Exception(f"Error 403 when requesting {url} : {response.content}")
-    return response.json()
+
+def get_artifact_index() -> ArtifactIndex:
+    """Return the artifact index of the configured repository, shared by the process."""
+    global _artifact_index
+    with _artifact_index_lock:
+        if _artifact_index is None:
+            _artifact_index = ArtifactIndex(
+                conf.web.github_repo,
+                api_url=conf.web.github_api_url or DEFAULT_GITHUB_API_URL,
+                auth=get_github_auth()
+            )
+        return _artifact_index
 
 
 def get_github_auth() -> tuple:
@@ -52,54 +214,26 @@ def get_github_auth() -> tuple:
     return os.environ["GITHUB_USERNAME"], os.environ["GITHUB_TOKEN"]
 
 
-def get_last_artifact(artifact_name: str) -> dict:
+def get_last_artifact(artifact_name: str, refresh: bool = True) -> tuple:
     """
     Retrieve the most recent artifact matching the provided name.
 
     Args:
         artifact_name: Name of the artifact.
+        refresh: Whether to update the artifact index first.
 
     Returns:
-        dict: Dictionary containing the date and URL of the last available artifact.
+        tuple: The date and URL of the last available artifact.
 
     Raises:
         IOError: If no matching artifact is found.
     """
-    artifacts = get_artifacts()
-    _log_artifacts_info(artifacts, artifact_name)
-    relevant_artifacts = _filter_relevant_artifacts(artifacts, artifact_name)
-
-    last_result = _find_last_artifact(relevant_artifacts)
-    if not last_result:
+    index = get_artifact_index()
+    if refresh:
+        index.refresh()
+    last_artifact = index.get_latest(artifact_name)
+    if last_artifact is None:
         raise IOError(f"No artifact found with name {artifact_name}")
 
-    logger.debug(f"Last available artifact: {last_result}")
-    return last_result
-
-
-def _log_artifacts_info(artifacts: dict, artifact_name: str):
-    """Log information about the fetched artifacts."""
-    num_artifacts = artifacts.get("total_count", 0)
-    logger.debug(f"{num_artifacts} artifacts available on the project")
-
-    if num_artifacts > MAX_ARTIFACTS_PER_PAGE:
-        logger.warning("Some artifacts were not retrieved due to GitHub artifact pagination")
-
-
-def _filter_relevant_artifacts(artifacts: dict, artifact_name: str) -> list:
-    """Filter out artifacts based on given criteria."""
-    return [
-        artifact
-        for artifact in artifacts.get("artifacts", [])
-        if artifact.get("name") == artifact_name and not artifact.get("expired")
-    ]
-
-
-def _find_last_artifact(artifacts: list) -> dict:
-    """Find the most recent artifact from the list."""
-    results = {
-        datetime.strptime(artifact.get("created_at"), GITHUB_DATE_FORMAT): artifact.get("archive_download_url")
-        for artifact in artifacts
-    }
-
-    return sorted(results.items(), key=lambda x: x[0], reverse=True)[0] if results else None
+    logger.debug(f"Last available artifact: {last_artifact}")
+    return last_artifact["created_at"], last_artifact["url"]
@@ -4,17 +4,19 @@ import sys
 import streamlit.cli
 
 from application import data_downloader
-from application.model import train, predict, explain
+from application.model import train, predict, explain, serve, scenario, simulate
 
 
 def download_data(args):
     """Download data for the specified seasons."""
-    data_downloader.download_data(args.seasons)
+    data_downloader.download_data(
+        args.seasons, offline=args.offline, incremental=args.incremental
+    )
 
 
-def train_model():
+def train_model(args):
     """Train a model on downloaded data."""
-    train.train_model()
+    train.train_model(incremental_training=args.incremental, search_regressor=args.search)
 
 
 def make_predictions():
@@ -22,6 +24,32 @@ def make_predictions():
     predict.make_predictions()
 
 
+def serve_predictions(args):
+    """Serve predictions of the trained model over HTTP."""
+    serve.serve(host=args.host, port=args.port)
+
+
+def parse_perturbation(value):
+    """Parse a perturbation given as COLUMN=DELTA1,DELTA2,..."""
+    column, _, deltas = value.rpartition("=")
+    try:
+        return column, [float(delta) for delta in deltas.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid perturbation {value}, expected COLUMN=DELTA1,DELTA2,...")
+
+
+def run_scenarios(args):
+    """Score what-if scenarios of player stat lines."""
+    results = scenario.run_scenarios(args.players, dict(args.delta), season=args.season)
+    print(results.to_string(index=False))
+
+
+def run_simulations(args):
+    """Simulate the rest of the season to estimate MVP probabilities."""
+    results = simulate.run_simulations(n_simulations=args.n_simulations, top_n=args.top_n, seed=args.seed)
+    print(results.head(10).to_string(index=False))
+
+
 def explain_model():
     """Provide explanations for model decisions."""
     explain.explain_model()
@@ -52,11 +80,59 @@ def get_parser():
         type=int,
         help="Seasons to download data for"
     )
+    download_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only use pages from the local HTTP cache, without network access"
+    )
+    download_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch the given (by default, stale) seasons and merge them into existing data"
+    )
 
     # Model-related commands
-    subparsers.add_parser("train", help="Train a model on downloaded data")
+    train_parser = subparsers.add_parser("train", help="Train a model on downloaded data")
+    train_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the saved model from its weights when only a few seasons changed"
+    )
+    train_parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Search the best regressor and hyperparameters before training"
+    )
     subparsers.add_parser("predict", help="Make predictions with the trained model")
     subparsers.add_parser("explain", help="Explain the predictions made by the model")
+    scenario_parser = subparsers.add_parser("scenario", help="Score what-if scenarios of player stat lines")
+    scenario_parser.add_argument(
+        "--players",
+        required=True,
+        nargs="+",
+        help="Players to perturb, e.g. \"Nikola Jokic\" (spaces, punctuation, accents and case are ignored)"
+    )
+    scenario_parser.add_argument(
+        "--delta",
+        required=True,
+        action="append",
+        type=parse_perturbation,
+        help="Values added to a column, as COLUMN=DELTA1,DELTA2,... (repeat for a grid over several columns)"
+    )
+    scenario_parser.add_argument("--season", required=False, type=int, help="Season (current season by default)")
+    simulate_parser = subparsers.add_parser(
+        "simulate", help="Simulate the rest of the season to estimate MVP probabilities"
+    )
+    simulate_parser.add_argument(
+        "--n-simulations", required=False, type=int, help="Number of simulations (default from configuration)"
+    )
+    simulate_parser.add_argument(
+        "--top-n", required=False, type=int, help="Number of candidates simulated (default from configuration)"
+    )
+    simulate_parser.add_argument("--seed", required=False, type=int, help="Random seed (default from configuration)")
+    serve_parser = subparsers.add_parser("serve", help="Serve predictions of the trained model over HTTP")
+    serve_parser.add_argument("--host", required=False, help="Host to listen on (default from configuration)")
+    serve_parser.add_argument("--port", required=False, type=int, help="Port to listen on (default from configuration)")
 
     return parser
 
@@ -70,14 +146,17 @@ def run(args=None):
     # Commands without arguments
     no_arg_commands = {
         "web": run_webapp,
-        "train": train_model,
         "predict": make_predictions,
         "explain": explain_model
     }
 
     # Commands with arguments
     arg_commands = {
-        "download": download_data
+        "download": download_data,
+        "train": train_model,
+        "serve": serve_predictions,
+        "scenario": run_scenarios,
+        "simulate": run_simulations
     }
 
     if parsed_args.command in no_arg_commands:
@@ -1,36 +1,53 @@
-from typing import List, Optional, Any
+from datetime import datetime
+import json
+import os
+from typing import Callable, Dict, List, Optional, Any
+
+import pandas
 import requests
 
 from application import conf, logger
 from application import data_scrapper as ds
+from application.utils import load, storage, util_functions
+
+FIRST_SEASON = 1974
 
 
 def download_data(
         seasons: Optional[List[int]] = None,
-        scrapper: Optional[ds.Scrapper] = None
+        scrapper: Optional[ds.Scrapper] = None,
+        offline: bool = False,
+        incremental: bool = False
 ) -> None:
     """Central function to download multiple types of basketball data."""
-    if scrapper is None:
-        scrapper = ds.BasketballReferenceScrapper()
-
-    _download_with_logging(
-        "player stats",
-        download_player_stats,
-        seasons=seasons,
-        scrapper=scrapper
-    )
-    _download_with_logging(
-        "MVP votes",
-        download_mvp_votes,
-        seasons=seasons,
-        scrapper=scrapper
-    )
-    _download_with_logging(
-        "team standings",
-        download_team_standings,
-        seasons=seasons,
-        scrapper=scrapper
-    )
+    own_scrapper = scrapper is None
+    if own_scrapper:
+        scrapper = ds.BasketballReferenceScrapper(offline=offline)
+    try:
+        _download_with_logging(
+            "player stats",
+            download_player_stats,
+            seasons=seasons,
+            scrapper=scrapper,
+            incremental=incremental
+        )
+        _download_with_logging(
+            "MVP votes",
+            download_mvp_votes,
+            seasons=seasons,
+            scrapper=scrapper,
+            incremental=incremental
+        )
+        _download_with_logging(
+            "team standings",
+            download_team_standings,
+            seasons=seasons,
+            scrapper=scrapper,
+            incremental=incremental
+        )
+    finally:
+        if own_scrapper:
+            scrapper.close()
 
 
 def _download_with_logging(desc: str, func: Any, **kwargs) -> None:
@@ -42,38 +59,176 @@ def _download_with_logging(desc: str, func: Any, **kwargs) -> None:
         logger.error(f"Downloading {desc} failed: {e}")
 
 
-def download_player_stats(seasons: List[int], scrapper: ds.Scrapper) -> None:
+def download_player_stats(
+        seasons: List[int],
+        scrapper: ds.Scrapper,
+        incremental: bool = False
+) -> None:
     """Download player statistics and save to CSV."""
-    data = scrapper.get_player_stats(
-        subset_by_seasons=seasons,
-        subset_by_stat_types=["per_game", "per_36min", "per_100poss", "advanced"]
+    _download_dataset(
+        "player-stats",
+        lambda subset: scrapper.get_player_stats(
+            subset_by_seasons=subset,
+            subset_by_stat_types=["per_game", "per_36min", "per_100poss", "advanced"]
+        ),
+        load.load_player_stats,
+        seasons,
+        incremental,
+        last_season=util_functions.get_current_season()
     )
-    _save_to_csv(data, conf.data.player_stats)
 
 
-def download_mvp_votes(seasons: List[int], scrapper: ds.Scrapper) -> None:
+def download_mvp_votes(
+        seasons: List[int],
+        scrapper: ds.Scrapper,
+        incremental: bool = False
+) -> None:
     """Download MVP votes and save to CSV."""
-    data = scrapper.get_mvp(subset_by_seasons=seasons)
-    _save_to_csv(data, conf.data.mvp_votes)
+    _download_dataset(
+        "mvp-votes",
+        lambda subset: scrapper.get_mvp(subset_by_seasons=subset),
+        load.load_mvp_votes,
+        seasons,
+        incremental,
+        last_season=util_functions.get_current_season() - 1
+    )
 
 
-def download_team_standings(seasons: List[int], scrapper: ds.Scrapper) -> None:
+def download_team_standings(
+        seasons: List[int],
+        scrapper: ds.Scrapper,
+        incremental: bool = False
+) -> None:
     """Download team standings and save to CSV."""
-    data = scrapper.get_team_standings(subset_by_seasons=seasons)
-    _save_to_csv(data, conf.data.team_standings)
-
-
-def _save_to_csv(data: Any, config: Any) -> None:
-    """Helper function to save data to a CSV file."""
-    data.to_csv(
-        config.path,
-        sep=config.sep,
-        encoding=config.encoding,
-        compression=config.compression,
-        index=True
+    _download_dataset(
+        "team-standings",
+        lambda subset: scrapper.get_team_standings(subset_by_seasons=subset),
+        load.load_team_standings,
+        seasons,
+        incremental,
+        last_season=util_functions.get_current_season()
     )
 
 
+def _download_dataset(
+        name: str,
+        fetch: Callable[[Optional[List[int]]], pandas.DataFrame],
+        load_existing: Callable[[], pandas.DataFrame],
+        seasons: Optional[List[int]],
+        incremental: bool,
+        last_season: int
+) -> None:
+    """
+    Download one raw dataset and record its seasons in the manifest.
+
+    In incremental mode, only the requested seasons (or, by default, the stale ones)
+    are fetched and upserted into the existing dataset; seasons whose content did not
+    change leave the dataset file untouched.
+    """
+    data_conf = conf.data[name]
+    manifest = load_manifest()
+    dataset_manifest = manifest.setdefault(name, {})
+    existing = None
+    if incremental and os.path.exists(data_conf.path):
+        existing = load_existing()
+        if seasons is None:
+            seasons = get_stale_seasons(dataset_manifest, last_season)
+            if not seasons:
+                logger.info(f"All seasons of {name} are up to date")
+                return
+        logger.info(f"Refreshing {name} for seasons {', '.join(map(str, seasons))}")
+    elif incremental:
+        logger.info(f"No existing {name} dataset, downloading it")
+
+    data = fetch(seasons)
+    data["SEASON"] = data["SEASON"].astype(int)
+    season_hashes = util_functions.hash_seasons(data)
+    changed_seasons = [
+        season for season, sha256 in season_hashes.items()
+        if dataset_manifest.get(str(season), {}).get("sha256") != sha256
+    ]
+
+    if existing is not None:
+        if not changed_seasons:
+            logger.info(f"No change in {name}, keeping the existing dataset")
+        else:
+            storage.write(upsert_seasons(existing, data), data_conf)
+    else:
+        storage.write(data, data_conf)
+        dataset_manifest.clear()
+
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+    current_season = util_functions.get_current_season()
+    for season, sha256 in season_hashes.items():
+        dataset_manifest[str(season)] = {
+            "fetched_at": fetched_at,
+            "sha256": sha256,
+            "rows": int((data["SEASON"] == season).sum()),
+            "closed": season < current_season
+        }
+    save_manifest(manifest)
+
+
+def upsert_seasons(existing: pandas.DataFrame, data: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Insert or replace rows of a raw dataset.
+
+    Rows are matched on the index (`player_season_team` / `TEAM_SEASON`), and every
+    existing row of a refreshed season is replaced so removed rows do not linger.
+
+    Args:
+        existing: Current raw dataset.
+        data: Freshly downloaded rows.
+
+    Returns:
+        The merged dataset, ordered by season.
+    """
+    refreshed_seasons = data["SEASON"].astype(int).unique()
+    keep = (
+        ~existing.index.isin(data.index)
+        & ~existing["SEASON"].astype(int).isin(refreshed_seasons)
+    )
+    merged = pandas.concat([existing[keep], data], join="outer", axis="index")
+    merged.index.name = existing.index.name or data.index.name
+    return merged.sort_values(by="SEASON", kind="stable")
+
+
+def get_stale_seasons(dataset_manifest: Dict[str, dict], last_season: int) -> List[int]:
+    """
+    List the seasons of a dataset that need to be (re)downloaded.
+
+    A season is stale if it was never downloaded, or if it was still being played
+    when it was last downloaded.
+
+    Args:
+        dataset_manifest: Manifest entries of the dataset, keyed by season.
+        last_season: Most recent season available for the dataset.
+
+    Returns:
+        List of stale seasons.
+    """
+    return [
+        season
+        for season in range(FIRST_SEASON, last_season + 1)
+        if not dataset_manifest.get(str(season), {}).get("closed", False)
+    ]
+
+
+def load_manifest() -> dict:
+    """Load the download manifest (fetch time and content hash per dataset and season)."""
+    try:
+        with open(conf.data.manifest.path, encoding=conf.data.manifest.encoding) as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest: dict) -> None:
+    """Save the download manifest."""
+    with open(conf.data.manifest.path, "w", encoding=conf.data.manifest.encoding) as outfile:
+        json.dump(manifest, outfile, indent=conf.data.manifest.indent)
+
+
 def download_data_from_url_to_file(
         url: str,
         path: str,
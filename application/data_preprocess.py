@@ -1,7 +1,12 @@
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import joblib
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
+from application.utils.storage import FILTER_OPERATORS
+
 
 def standardize(dataframe: pd.DataFrame, fit_on: pd.DataFrame = None,
                 fit_per_values_of: pd.Series = None, min_max_scaler: bool = False) -> pd.DataFrame:
@@ -17,27 +22,226 @@ def standardize(dataframe: pd.DataFrame, fit_on: pd.DataFrame = None,
     Returns:
         A standardized dataframe.
     """
-    scaler = MinMaxScaler() if min_max_scaler else StandardScaler(with_mean=True, with_std=True)
-
     if fit_on is not None and fit_per_values_of is not None:
         raise NotImplementedError
 
-    scaled = dataframe.copy()
-    fit_on = fit_on or dataframe.copy()
-
     if fit_per_values_of is not None:
-        for unique in fit_per_values_of.unique():
-            curr_index = fit_per_values_of[fit_per_values_of == unique].index
-            df_subset = dataframe.loc[curr_index, :]
-            scaler.fit(df_subset)
-            scaled.loc[curr_index, :] = scaler.transform(df_subset)
-    else:
-        scaler.fit(fit_on)
-        scaled = scaler.transform(dataframe)
+        return GroupScaler(min_max_scaler=min_max_scaler).fit_transform(dataframe, fit_per_values_of)
+
+    scaler = MinMaxScaler() if min_max_scaler else StandardScaler(with_mean=True, with_std=True)
+    fit_on = fit_on or dataframe.copy()
+    scaler.fit(fit_on)
+    scaled = scaler.transform(dataframe)
 
     return pd.DataFrame(scaled, columns=dataframe.columns)
 
 
+class GroupScaler:
+    """
+    Standard or min-max scaler fitted independently on each group of rows (e.g. per season).
+
+    Group statistics are computed in a single groupby pass and applied with NumPy
+    broadcasting. They are kept in `offset_` and `scale_` (one row per group), so a
+    fitted scaler can be persisted and reused without refitting known groups.
+    """
+
+    def __init__(self, min_max_scaler: bool = False):
+        """
+        Args:
+            min_max_scaler: Scale to [0, 1] if True, otherwise to zero mean and unit variance.
+        """
+        self.min_max_scaler = min_max_scaler
+        self.columns_ = None
+        self.offset_ = None
+        self.scale_ = None
+
+    def _group_statistics(self, dataframe: pd.DataFrame, groups: pd.Series) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        grouped = dataframe.groupby(np.asarray(groups), sort=True)
+        if self.min_max_scaler:
+            offset = grouped.min()
+            scale = grouped.max() - offset
+        else:
+            offset = grouped.mean()
+            scale = grouped.std(ddof=0)
+        # Same as sklearn scalers: constant columns are left unscaled
+        scale = scale.mask((scale == 0.0) | scale.isna(), 1.0)
+        return offset, scale
+
+    def fit(self, dataframe: pd.DataFrame, groups: pd.Series) -> "GroupScaler":
+        """
+        Fit the statistics of every group, replacing those of already known groups.
+
+        Args:
+            dataframe: Numerical data to fit on.
+            groups: Group of each row (aligned on the rows of the dataframe).
+
+        Returns:
+            The fitted scaler.
+        """
+        offset, scale = self._group_statistics(dataframe, groups)
+        if self.columns_ is None or list(dataframe.columns) != self.columns_:
+            self.columns_ = list(dataframe.columns)
+            self.offset_, self.scale_ = offset, scale
+        else:
+            self.offset_ = pd.concat([self.offset_.drop(offset.index, errors="ignore"), offset]).sort_index()
+            self.scale_ = pd.concat([self.scale_.drop(scale.index, errors="ignore"), scale]).sort_index()
+        return self
+
+    def transform(self, dataframe: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+        """
+        Scale each row with the statistics of its group.
+
+        Groups unknown to the scaler are fitted first, on the given rows.
+
+        Args:
+            dataframe: Numerical data to scale.
+            groups: Group of each row.
+
+        Returns:
+            The scaled dataframe, with the same index.
+        """
+        if self.columns_ is None:
+            raise ValueError("GroupScaler must be fitted before calling transform")
+        dataframe = dataframe[self.columns_]
+        groups = np.asarray(groups)
+        missing = pd.Index(pd.unique(groups)).difference(self.offset_.index)
+        if len(missing) > 0:
+            in_missing = missing.get_indexer(groups) >= 0
+            self.fit(dataframe[in_missing], groups[in_missing])
+        positions = self.offset_.index.get_indexer(groups)
+        scaled = (
+            dataframe.to_numpy(dtype=float) - self.offset_.to_numpy()[positions]
+        ) / self.scale_.to_numpy()[positions]
+        return pd.DataFrame(scaled, index=dataframe.index, columns=self.columns_)
+
+    def fit_transform(self, dataframe: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+        """Fit the statistics of every group, then scale the dataframe."""
+        return self.fit(dataframe, groups).transform(dataframe, groups)
+
+    def drop_groups(self, groups: list) -> "GroupScaler":
+        """Forget the statistics of some groups, so they are refitted on the next transform."""
+        if self.columns_ is not None:
+            self.offset_ = self.offset_.drop(groups, errors="ignore")
+            self.scale_ = self.scale_.drop(groups, errors="ignore")
+        return self
+
+
+class PreprocessingPipeline:
+    """
+    Fitted preprocessing turning silver rows into model inputs.
+
+    It holds everything needed to rebuild the model features from raw player rows:
+    the selected numerical and categorical columns, the per-season scaler, the
+    one-hot layout of categorical columns and the final list of model features.
+    Training fits and saves it next to the model; prediction and explanation load it
+    and call `transform`, so their inputs cannot drift from training.
+    """
+
+    def __init__(self, num_features: List[str], cat_features: List[str],
+                 min_max_scaler: bool = False, group_by: str = "SEASON"):
+        """
+        Args:
+            num_features: Numerical columns, scaled per group.
+            cat_features: Categorical columns, one-hot encoded.
+            min_max_scaler: Use min-max scaling if True, otherwise standard scaling.
+            group_by: Column whose values define the scaling groups.
+        """
+        self.num_features = list(num_features)
+        self.cat_features = list(cat_features)
+        self.group_by = group_by
+        self.scaler = GroupScaler(min_max_scaler=min_max_scaler)
+        self.dummy_columns_ = None
+        self.dummy_sources_ = None
+        self.model_features_ = None
+
+    def fit(self, data: pd.DataFrame) -> "PreprocessingPipeline":
+        """Fit the per-group scaling statistics and the one-hot layout."""
+        self.scaler.fit(data[self.num_features], data[self.group_by])
+        self.dummy_columns_ = list(pd.get_dummies(data[self.cat_features]).columns) if self.cat_features else []
+        # Source column and value of each one-hot column, as named by pandas.get_dummies
+        self.dummy_sources_ = {}
+        for column in self.cat_features:
+            values = pd.get_dummies(data[column]).columns
+            names = pd.get_dummies(data[column], prefix=column).columns
+            self.dummy_sources_.update((name, (column, value)) for name, value in zip(names, values))
+        return self
+
+    def set_model_features(self, features: List[str]) -> "PreprocessingPipeline":
+        """Restrict the output of `transform` to the features used by the model."""
+        self.model_features_ = list(features)
+        return self
+
+    def transform(self, data: pd.DataFrame, refit_groups: Optional[list] = None) -> pd.DataFrame:
+        """
+        Build model inputs from silver rows.
+
+        Args:
+            data: Silver rows (extra columns are ignored).
+            refit_groups: Groups whose scaling statistics must be refitted on `data`,
+                e.g. the current season whose rows change every day.
+
+        Returns:
+            Model inputs, indexed like `data`: the model features if they are set,
+            otherwise every processed column.
+        """
+        if self.dummy_columns_ is None:
+            raise ValueError("PreprocessingPipeline must be fitted before calling transform")
+        if refit_groups:
+            self.scaler.drop_groups(refit_groups)
+        processed = self.scaler.transform(data[self.num_features], data[self.group_by])
+        if self.cat_features:
+            dummies = pd.get_dummies(data[self.cat_features]).reindex(columns=self.dummy_columns_, fill_value=0)
+            processed = pd.concat([processed, dummies], axis=1)
+        if self.model_features_ is not None:
+            processed = processed[self.model_features_]
+        return processed
+
+    def transform_array(self, data: Mapping[str, Any]) -> np.ndarray:
+        """
+        Build the model input matrix of rows whose groups are already fitted, with NumPy only.
+
+        Same values as `transform(data)` restricted to the model features, without its
+        DataFrame overhead: meant for callers scoring a few rows at a time.
+
+        Args:
+            data: Silver rows of fitted groups, as a DataFrame or a mapping of column
+                names to arrays (numerical values must be filled).
+
+        Returns:
+            Model inputs, one column per model feature.
+        """
+        if self.model_features_ is None:
+            raise ValueError("Model features must be set before calling transform_array")
+        groups = np.asarray(data[self.group_by])
+        positions = self.scaler.offset_.index.get_indexer(groups)
+        if (positions < 0).any():
+            raise ValueError(f"No scaling statistics for {self.group_by} {sorted(set(groups[positions < 0]))}")
+        X = np.zeros((len(groups), len(self.model_features_)))
+        num_targets, num_sources = [], []
+        for target, feature in enumerate(self.model_features_):
+            if feature in self.scaler.columns_:
+                num_targets.append(target)
+                num_sources.append(self.scaler.columns_.index(feature))
+            elif feature in self.dummy_sources_:
+                column, value = self.dummy_sources_[feature]
+                X[:, target] = np.asarray(data[column]).astype(str) == str(value)
+            else:
+                raise ValueError(f"Model feature {feature} is neither a numerical nor a one-hot column")
+        values = np.column_stack([np.asarray(data[self.scaler.columns_[source]], dtype=float) for source in num_sources])
+        offset = self.scaler.offset_.to_numpy()[positions][:, num_sources]
+        scale = self.scaler.scale_.to_numpy()[positions][:, num_sources]
+        X[:, num_targets] = (values - offset) / scale
+        return X
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Fit the pipeline, then build model inputs from the same rows."""
+        return self.fit(data).transform(data)
+
+    def save(self, path: str) -> None:
+        """Save the fitted pipeline."""
+        joblib.dump(self, path)
+
+
 def get_numerical_columns(dataframe: pd.DataFrame) -> list:
     """
     Get numerical columns from the dataframe.
@@ -106,7 +310,8 @@ def select_random_unique_values(series: pd.Series, share: float) -> list:
 
 
 def scale_per_value_of(data: pd.DataFrame, selected_cat_features: list, selected_num_features: list,
-                       fit_per_value_of: pd.Series, min_max_scaler: bool = True) -> tuple:
+                       fit_per_value_of: pd.Series, min_max_scaler: bool = True,
+                       scaler: Optional[GroupScaler] = None) -> tuple:
     """
     Scale dataframe values based on specified categorical and numerical features.
 
@@ -116,6 +321,8 @@ def scale_per_value_of(data: pd.DataFrame, selected_cat_features: list, selected
         selected_num_features: List of numerical features.
         fit_per_value_of: Series to fit the scaler on unique values.
         min_max_scaler: Use MinMaxScaler if True, otherwise StandardScaler.
+        scaler: Group scaler to use. If already fitted, the statistics of known values
+            are reused instead of being refitted; otherwise it is fitted in place.
 
     Returns:
         Tuple containing processed dataframe and raw data.
@@ -123,9 +330,11 @@ def scale_per_value_of(data: pd.DataFrame, selected_cat_features: list, selected
     if not selected_num_features:
         raise NotImplementedError("Need at least 1 numerical feature")
 
-    processed_num_data = standardize(
-        data[selected_num_features], fit_on=None, fit_per_values_of=fit_per_value_of, min_max_scaler=min_max_scaler
-    )
+    if scaler is None:
+        scaler = GroupScaler(min_max_scaler=min_max_scaler)
+    if scaler.columns_ is None:
+        scaler.fit(data[selected_num_features], fit_per_value_of)
+    processed_num_data = scaler.transform(data[selected_num_features], fit_per_value_of)
 
     if selected_cat_features:
         processed_cat_data = pd.get_dummies(data[selected_cat_features])
@@ -136,3 +345,47 @@ def scale_per_value_of(data: pd.DataFrame, selected_cat_features: list, selected
         raw_data = data[selected_num_features]
 
     return processed_data, raw_data
+
+
+def get_filters_mask(data: pd.DataFrame, filters: List[dict],
+                     group_by: Optional[str] = None) -> Tuple[pd.Series, Dict[str, int]]:
+    """
+    Evaluate a set of row filters in a single pass.
+
+    Each filter is a mapping with a `column`, an `operator` (>=, >, <=, <, ==, !=, in) and a
+    `value`. If `relative-to-group-max` is true, the value is a fraction of the maximum of
+    the column within each group of `group_by` (e.g. 50% of the games of the season).
+    Group maxima of every relative filter are computed by one groupby-transform.
+
+    Args:
+        data: Input dataframe.
+        filters: List of filter definitions, applied in order.
+        group_by: Column defining the groups of relative filters.
+
+    Returns:
+        Tuple containing the mask of kept rows and, for each filter, the number of rows
+        it removed among those kept by the previous filters.
+    """
+    relative_columns = list(dict.fromkeys(
+        f["column"] for f in filters if f.get("relative-to-group-max")
+    ))
+    if relative_columns and group_by is None:
+        raise ValueError("Filters relative to group maxima need a group_by column")
+    group_max = (
+        data.groupby(group_by)[relative_columns].transform("max") if relative_columns else None
+    )
+
+    mask = pd.Series(True, index=data.index)
+    drop_counts = {}
+    for f in filters:
+        column, op, value = f["column"], f["operator"], f["value"]
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator {op}")
+        threshold = value * group_max[column] if f.get("relative-to-group-max") else value
+        kept = FILTER_OPERATORS[op](data[column], threshold).to_numpy()
+        description = f"{column} {op} {value}" + (
+            f" x {group_by} max" if f.get("relative-to-group-max") else ""
+        )
+        drop_counts[description] = int((mask.to_numpy() & ~kept).sum())
+        mask &= kept
+    return mask, drop_counts
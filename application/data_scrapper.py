@@ -1,19 +1,21 @@
 import datetime
-import time
-import requests
+import functools
 import pandas
 from abc import ABC, abstractmethod
 from bs4 import BeautifulSoup
+from application.fetch_scheduler import FetchScheduler
 from application.get_seasons_data import get_standings
 from application.utils import util_functions
-from application import logger
+from application import conf, logger
+
+ROOT_URL = "https://www.basketball-reference.com/"
 
 
 class Scrapper(ABC):
     """Abstract class working as an interface for scrapper classes."""
 
     @abstractmethod
-    def retrieve_mvp_votes(season: int):
+    def retrieve_mvp_votes(self, season: int):
         pass
 
     @abstractmethod
@@ -21,7 +23,7 @@ class Scrapper(ABC):
         pass
 
     @abstractmethod
-    def get_roster_stats_v2(season, stat_type):
+    def get_roster_stats_v2(self, season, stat_type):
         pass
 
     @abstractmethod
@@ -37,19 +39,34 @@ class Scrapper(ABC):
     ):
         pass
 
+    def close(self):
+        """Release the resources held by the scrapper."""
+
 
 class BasketballReferenceScrapper(Scrapper):
-    def __init__(self):
+    def __init__(self, scheduler: FetchScheduler = None, offline: bool = False):
         self.team_names = util_functions.get_dict_from_yaml(
             "application/utils/team_names.yaml"
         )
+        if scheduler is None:
+            scheduler = FetchScheduler.from_conf(conf.scrapper, offline=offline)
+        self.scheduler = scheduler
+
+    def close(self):
+        """Wait for pending requests and save the response cache index."""
+        self.scheduler.close()
+
+    @staticmethod
+    def _mvp_votes_url(season):
+        return f"{ROOT_URL}awards/awards_{season}.html"
+
+    def retrieve_mvp_votes(self, season):
+        r = self.scheduler.get(self._mvp_votes_url(season), season=season)
+        return self._parse_mvp_votes(r, season)
 
     @staticmethod
-    def retrieve_mvp_votes(season):
+    def _parse_mvp_votes(r, season):
         season = str(season)
-        root_url = "https://www.basketball-reference.com/"
-        url = f"{root_url}awards/awards_{season}.html"
-        r = requests.get(url)
         if r.status_code == 200:
             soup = BeautifulSoup(r.content, "html.parser")
             table_mvp = soup.find("table", id="mvp")
@@ -102,11 +119,13 @@ class BasketballReferenceScrapper(Scrapper):
             ]
         else:
             seasons = allowed_seasons
+        responses = self.scheduler.map(
+            [self._mvp_votes_url(season) for season in seasons], seasons=list(seasons)
+        )
         total_dfs = []
-        for season in seasons:
-            time.sleep(5)
+        for season, response in zip(seasons, responses):
             logger.info(f"Retrieving MVP of season {season}...")
-            results = self.retrieve_mvp_votes(season)
+            results = self._parse_mvp_votes(response.result(), season)
             results.loc[:, "player_season_team"] = (
                     results["PLAYER"].str.replace(" ", "")
                     + "_"
@@ -122,15 +141,7 @@ class BasketballReferenceScrapper(Scrapper):
         return all_df
 
     @staticmethod
-    def get_roster_stats_v2(season, stat_type):
-        """
-        Return all players stats for one season.
-        Season : end year of season, as int or str
-        Available stat types (case insensitive) : 'totals', 'per_game', 'per_36min', 'per_100poss', 'advanced'
-        """
-        root_url = "https://www.basketball-reference.com/"
-        season = str(season)
-        stat_type = str(stat_type).lower()
+    def _roster_stats_url(season, stat_type):
         url_mapper = {
             "totals": "totals",
             "per_game": "per_game",
@@ -138,9 +149,21 @@ class BasketballReferenceScrapper(Scrapper):
             "per_100poss": "per_poss",
             "advanced": "advanced"
         }
-        stat_type = url_mapper[stat_type]
-        url = f"{root_url}leagues/NBA_{season}_{stat_type}.html"
-        r = requests.get(url)
+        stat_type = url_mapper[str(stat_type).lower()]
+        return f"{ROOT_URL}leagues/NBA_{season}_{stat_type}.html"
+
+    def get_roster_stats_v2(self, season, stat_type):
+        """
+        Return all players stats for one season.
+        Season : end year of season, as int or str
+        Available stat types (case insensitive) : 'totals', 'per_game', 'per_36min', 'per_100poss', 'advanced'
+        """
+        r = self.scheduler.get(self._roster_stats_url(season, stat_type), season=season)
+        return self._parse_roster_stats(r, season)
+
+    @staticmethod
+    def _parse_roster_stats(r, season):
+        season = str(season)
         if r.status_code == 200:
             soup = BeautifulSoup(r.content, "html.parser")
             table = soup.find("table")
@@ -161,7 +184,6 @@ class BasketballReferenceScrapper(Scrapper):
                     data[col] = data[col].fillna(0.0)
             return data
         else:
-            retry_after = r.headers["Retry-After"]
             raise ConnectionError(
                 "Could not connect to BR and get data, status code : %s", r.status_code
             )
@@ -182,15 +204,20 @@ class BasketballReferenceScrapper(Scrapper):
             ]
         else:
             seasons = allowed_seasons
+        standings = [
+            self.scheduler.call(
+                get_standings,
+                date="06-01-" + str(season),
+                get=functools.partial(self.scheduler.get, season=season)
+            )
+            for season in seasons
+        ]
         total_dfs = []
-        for season in seasons:
-            time.sleep(5)
+        for season, season_standings in zip(seasons, standings):
             logger.info(f"Retrieving standings of season {season}...")
-            date = "06-01-" + str(season)
             dfs = []
-            results = get_standings(date=date)
+            results = season_standings.result()
             for conference, data in results.items():
-                time.sleep(5)
                 logger.info(f"Standings data columns: {', '.join(data.columns)}")
                 data = data.dropna(axis="index", how="any")
                 logger.info(
@@ -278,9 +305,15 @@ class BasketballReferenceScrapper(Scrapper):
             ]
         else:
             stat_types = allowed_stat_types
+        responses = {
+            (season, stat_type): self.scheduler.submit(
+                self._roster_stats_url(season, stat_type), season=season
+            )
+            for season in seasons
+            for stat_type in stat_types
+        }
         season_dfs = []
         for season in seasons:
-            time.sleep(5)
             do_not_suffix = [
                 "PLAYER",
                 "POS",
@@ -298,10 +331,11 @@ class BasketballReferenceScrapper(Scrapper):
             ]
             stat_type_dfs = []
             for stat_type in stat_types:
-                time.sleep(5)
                 logger.info(f"Retrieving {stat_type} stats for season {season}...")
                 try:
-                    stat_type_df = self.get_roster_stats_v2(season, stat_type)
+                    stat_type_df = self._parse_roster_stats(
+                        responses[(season, stat_type)].result(), season
+                    )
                 except Exception as e:
                     logger.warning(
                         f"Could not retrieve data. Are you sure NBA was played in season {season}? {e}"
@@ -0,0 +1,185 @@
+import threading
+import time
+from concurrent import futures
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from application import logger
+from application.http_cache import ResponseCache
+
+RETRY_STATUS_CODES = (429, 503)
+DEFAULT_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate of every worker sharing it."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens (burst size).
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("Token bucket needs a positive rate and a capacity of at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        """Stop handing out tokens for the given duration (e.g. after a Retry-After)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either a number of seconds or an HTTP date.
+
+    Returns:
+        Number of seconds to wait, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+    return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class FetchScheduler:
+    """
+    Run HTTP GET requests concurrently on a thread pool under a global token-bucket rate limit.
+
+    Responses with a 429/503 status are retried after the delay given by their Retry-After
+    header, during which no other worker is allowed to send a request.
+    When a response cache is given, requests go through it and only cache misses and
+    revalidations consume rate-limit tokens.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: float = 20.0,
+            burst: int = 1,
+            max_workers: int = 4,
+            max_retries: int = 3,
+            timeout: float = 30.0,
+            cache: Optional[ResponseCache] = None
+    ):
+        self.cache = cache
+        self.bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=burst)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fetch"
+        )
+        self._local = threading.local()
+
+    @classmethod
+    def from_conf(cls, scrapper_conf: Any, offline: bool = False) -> "FetchScheduler":
+        """Build a scheduler from the `scrapper` section of the configuration."""
+        cache = None
+        if scrapper_conf.cache.path:
+            cache = ResponseCache.from_conf(scrapper_conf.cache, offline=offline)
+        elif offline:
+            raise ValueError("Offline mode requires a response cache (scrapper.cache.path)")
+        return cls(
+            requests_per_minute=scrapper_conf.requests_per_minute or 20.0,
+            burst=scrapper_conf.burst or 1,
+            max_workers=scrapper_conf.max_workers or 4,
+            max_retries=scrapper_conf.max_retries if scrapper_conf.max_retries is not None else 3,
+            timeout=scrapper_conf.timeout or 30.0,
+            cache=cache
+        )
+
+    def _session(self) -> requests.Session:
+        """Return the pooled session of the current thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def get(self, url: str, season: Optional[int] = None) -> requests.Response:
+        """
+        Fetch a URL, from the cache if possible.
+
+        Args:
+            url: Requested URL.
+            season: Season the page belongs to, used by the cache freshness policy.
+        """
+        if self.cache is not None:
+            return self.cache.get(url, fetch=self._fetch, season=season)
+        return self._fetch(url)
+
+    def _fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Send a request, waiting for the rate limiter and honouring Retry-After."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self._session().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = DEFAULT_BACKOFF_SECONDS * (2 ** attempt)
+            logger.warning(
+                f"Status {response.status_code} for {url}, retrying in {delay:.0f}s "
+                f"(attempt {attempt + 1} of {self.max_retries})"
+            )
+            self.bucket.block_for(delay)
+        return response
+
+    def submit(self, url: str, season: Optional[int] = None) -> futures.Future:
+        """Schedule the fetch of a URL and return its future response."""
+        return self._executor.submit(self.get, url, season)
+
+    def map(self, urls: List[str], seasons: Optional[List[int]] = None) -> List[futures.Future]:
+        """Schedule the fetch of several URLs, returning futures in the same order."""
+        if seasons is None:
+            seasons = [None] * len(urls)
+        return [self.submit(url, season) for url, season in zip(urls, seasons)]
+
+    def call(self, func: Callable, *args, **kwargs) -> futures.Future:
+        """Run a callable performing its own requests (through `get`) on the pool."""
+        return self._executor.submit(func, *args, **kwargs)
+
+    def close(self) -> None:
+        """Wait for pending requests, release the worker threads and save the cache index."""
+        self._executor.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.flush()
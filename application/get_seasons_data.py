@@ -88,7 +88,7 @@ def get_schedule(season, playoffs=False):
     return df
 
 
-def get_standings(date=None):
+def get_standings(date=None, get=get):
     if date is None:
         date = datetime.now()
     else:
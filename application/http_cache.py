@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from application import logger
+from application.utils import util_functions
+
+INDEX_FILE_NAME = "index.json"
+OBJECTS_DIR_NAME = "objects"
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+# Maximum number of seconds access times of cache hits stay unsaved
+INDEX_SAVE_INTERVAL = 30.0
+
+
+class OfflineCacheMiss(ConnectionError):
+    """Raised when a URL is requested in offline mode but is not in the cache."""
+
+
+class CachedResponse:
+    """Minimal stand-in for `requests.Response` served from the cache."""
+
+    def __init__(self, url: str, content: bytes, headers: Optional[dict] = None):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = True
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of HTTP GET responses, keyed by URL.
+
+    Bodies are stored once per SHA-256 of their content under `objects/`, and an
+    index maps each URL to its body hash, validators (ETag/Last-Modified) and timestamps.
+    Pages of closed seasons are immutable and never revalidated; other pages are
+    revalidated with a conditional request. The least recently used entries are
+    evicted once the total size exceeds `max_size_bytes`.
+
+    The index is saved when a response is stored. Access times of cache hits are
+    kept in memory, and saved at most every `INDEX_SAVE_INTERVAL` seconds and on `flush`.
+    """
+
+    def __init__(self, directory: str, max_size_bytes: int, offline: bool = False):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, OBJECTS_DIR_NAME), exist_ok=True)
+        self._index = self._load_index()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    @classmethod
+    def from_conf(cls, cache_conf, offline: bool = False) -> "ResponseCache":
+        """Build a cache from the `scrapper.cache` section of the configuration."""
+        return cls(
+            directory=cache_conf.path,
+            max_size_bytes=int((cache_conf.max_size_mb or 500) * 1024 * 1024),
+            offline=offline
+        )
+
+    @staticmethod
+    def is_immutable(season: Optional[int]) -> bool:
+        """Pages of seasons that are over never change."""
+        return season is not None and int(season) < util_functions.get_current_season()
+
+    def get(
+            self,
+            url: str,
+            fetch: Callable[[str, Dict[str, str]], object],
+            season: Optional[int] = None
+    ):
+        """
+        Return the response for a URL, from the cache when it is fresh.
+
+        Args:
+            url: Requested URL.
+            fetch: Function sending the GET request, called with the URL and extra headers.
+            season: Season the page belongs to, used by the freshness policy.
+
+        Returns:
+            A `CachedResponse` or the response returned by `fetch`.
+
+        Raises:
+            OfflineCacheMiss: In offline mode, if the URL has never been cached.
+        """
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is not None and not os.path.exists(self._object_path(entry["sha256"])):
+            entry = None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"{url} is not available in the cache")
+            return self._hit(url, entry)
+        if entry is not None and (entry["immutable"] or self.is_immutable(season)):
+            return self._hit(url, entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = fetch(url, headers)
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"Cache revalidated {url}")
+            with self._lock:
+                entry["fetched_at"] = time.time()
+                self._dirty = True
+            return self._hit(url, entry)
+        if response.status_code == 200:
+            self._store(url, response, self.is_immutable(season))
+        return response
+
+    def _hit(self, url: str, entry: dict) -> CachedResponse:
+        with open(self._object_path(entry["sha256"]), "rb") as file_reader:
+            content = file_reader.read()
+        with self._lock:
+            entry["accessed_at"] = time.time()
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL:
+                self._save_index()
+        return CachedResponse(url, content, entry.get("headers"))
+
+    def _store(self, url: str, response, immutable: bool) -> None:
+        content = response.content
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file_writer:
+                file_writer.write(content)
+            os.replace(tmp_path, path)
+        now = time.time()
+        headers = {key: response.headers[key] for key in CACHED_HEADERS if key in response.headers}
+        with self._lock:
+            self._index[url] = {
+                "sha256": sha256,
+                "size": len(content),
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "headers": headers,
+                "immutable": immutable,
+                "fetched_at": now,
+                "accessed_at": now
+            }
+            self._evict()
+            self._save_index()
+
+    def flush(self) -> None:
+        """Save the index if access or revalidation times changed since it was last saved."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its size budget."""
+        sizes = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        total_size = sum(sizes.values())
+        if total_size <= self.max_size_bytes:
+            return
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1]["accessed_at"]):
+            if total_size <= self.max_size_bytes:
+                break
+            del self._index[url]
+            sha256 = entry["sha256"]
+            if any(other["sha256"] == sha256 for other in self._index.values()):
+                continue
+            total_size -= sizes[sha256]
+            try:
+                os.remove(self._object_path(sha256))
+            except FileNotFoundError:
+                pass
+            logger.debug(f"Evicted {url} from cache")
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, OBJECTS_DIR_NAME, sha256[:2], sha256)
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE_NAME)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path(), encoding="utf-8") as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("HTTP cache index is corrupted, starting from an empty cache")
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self._index_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as json_file:
+            json.dump(self._index, json_file)
+        os.replace(tmp_path, self._index_path())
+        self._dirty = False
+        self._saved_at = time.monotonic()
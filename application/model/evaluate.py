@@ -27,3 +27,32 @@ def share(series: Series) -> Series:
         Series: Series of shares (total is 1).
     """
     return series / series.sum()
+
+
+def grouped_softmax(series: Series, groups: Series) -> Series:
+    """
+    Compute softmax values of the scores of each group, in a single pass over all groups.
+
+    Args:
+        series (Series): Input values, NaN for values excluded from their group.
+        groups (Series): Group of each value (same index as the values).
+
+    Returns:
+        Series: Softmax-transformed values (total is 1 in each group, 0 for excluded values).
+    """
+    exp_values = np.exp(series - series.groupby(groups, sort=False).transform("max")).fillna(0.0)
+    return exp_values / exp_values.groupby(groups, sort=False).transform("sum")
+
+
+def grouped_share(series: Series, groups: Series) -> Series:
+    """
+    Compute the share of each value in the total of its group, in a single pass over all groups.
+
+    Args:
+        series (Series): Input values, NaN for values excluded from their group.
+        groups (Series): Group of each value (same index as the values).
+
+    Returns:
+        Series: Series of shares (total is 1 in each group, 0 for excluded values).
+    """
+    return series.fillna(0.0) / series.groupby(groups, sort=False).transform("sum")
@@ -1,62 +1,250 @@
+import hashlib
+import json
+from typing import Dict, List
+
+import joblib
+import numpy as np
 import pandas as pd
 import shap
+from joblib import Parallel, delayed, effective_n_jobs
 
 from application import conf, logger
-from application.utils import load
+from application.model import shap_history
+from application.utils import load, storage
 
 
 def load_data_and_preprocess():
     """Load necessary data and preprocess for SHAP explanation."""
-    model_input = load.load_model_input()
-    predictions = load.load_predictions().sort_values(by="PRED_RANK", ascending=True)
-    return model_input, predictions
-
+    return load.load_predictions().sort_values(by="PRED_RANK", ascending=True)
 
-def get_sample_and_population(model_input, predictions, sample_size=10, population_size=100):
-    """Extract sample and population from model input and predictions."""
-    player_season_team_list = predictions.index.to_list()
 
+def get_sample(predictions, pipeline, sample_size=50):
+    """Build the model inputs of the top players of the predictions."""
     logger.debug(f"SHAP values will be computed for : {sample_size} top players")
-    sample = model_input[model_input.index.isin(player_season_team_list[:sample_size])]
-
-    logger.debug(f"Number of players in predictions : {len(player_season_team_list)}")
-    # New method : Sample players randomly.
-    population = model_input.sample(population_size)
-    logger.debug(f"Population size for SHAP : {population_size}")
-
-    return sample, population
-
+    logger.debug(f"Number of players in predictions : {len(predictions)}")
+    return pipeline.transform(predictions.head(sample_size))
+
+
+def stratified_sample(X, strata, sample_size=1000, seed=0):
+    """
+    Sample rows with a fixed seed, each stratum keeping its share of the rows (at least one row).
+
+    Args:
+        X: Rows to sample.
+        strata: Stratum of each row (same index as the rows).
+        sample_size: Number of rows to sample (all rows if there are fewer).
+        seed: Seed of the random generator.
+
+    Returns:
+        The sampled rows, in their original order.
+    """
+    if len(X) <= sample_size:
+        return X
+    rng = np.random.default_rng(seed)
+    positions = []
+    for _, stratum_positions in pd.Series(np.arange(len(X))).groupby(strata.to_numpy(), sort=True):
+        n_rows = max(1, int(round(sample_size * len(stratum_positions) / len(X))))
+        n_rows = min(n_rows, len(stratum_positions))
+        positions.append(rng.choice(stratum_positions.to_numpy(), size=n_rows, replace=False))
+    return X.iloc[np.sort(np.concatenate(positions))]
+
+
+def get_background(population, background_size=20):
+    """
+    Summarize the population with k-means, as cluster centers weighted by cluster size.
+
+    Args:
+        population: Model inputs the explanations are relative to.
+        background_size: Number of clusters.
+
+    Returns:
+        The weighted background set.
+    """
+    background_size = min(background_size, len(population))
+    logger.debug(f"Background for SHAP : {background_size} k-means clusters of {len(population)} players")
+    return shap.kmeans(population, background_size)
+
+
+def build_background(model, X, strata):
+    """
+    Build the SHAP background of a trained model from its training rows.
+
+    Rows are sampled with a fixed seed, stratified by season and MVP candidacy, then
+    summarized with k-means, so that the same model and training data always give the
+    same background. The base value of the explanations (expected output of the explainer
+    of the model on the background) is computed once, with the background.
+
+    Args:
+        model: Trained model.
+        X: Training rows (model inputs).
+        strata: Stratum of each training row.
+
+    Returns:
+        The background, its predictions, the base value and the version of the explanations.
+    """
+    explain_conf = conf.explain
+    sample = stratified_sample(
+        X, strata, sample_size=explain_conf.background_sample_size or 1000, seed=explain_conf.background_seed or 0
+    )
+    background = get_background(sample, explain_conf.background_size or 20)
+    features = list(X.columns)
+    predictions = model.predict(pd.DataFrame(background.data, columns=features))
+    # Tree explainers do not weight the background, their base value is its plain mean
+    explainer = make_explainer(model, background, features)
+    return {
+        "version": get_explanation_version(conf.data.model.path, background, features),
+        "features": features,
+        "background": background,
+        "predictions": predictions,
+        "base_value": float(np.ravel(explainer.expected_value)[0])
+    }
+
+
+def save_background(model, X, strata):
+    """Build the SHAP background of the saved model and save it next to the model."""
+    joblib.dump(build_background(model, X, strata), conf.data.shap_background.path)
+
+
+def make_explainer(model, background, features):
+    """
+    Build the fastest SHAP explainer supported by the model.
+
+    Tree ensembles are explained exactly by TreeExplainer (interventional, on the background
+    cluster centers), linear models by LinearExplainer on the background mean and covariance,
+    and other models (e.g. the MLP) by KernelExplainer on the weighted background.
+    """
+    weights = np.asarray(background.weights, dtype=float)
+    if hasattr(model, "estimators_") and hasattr(model, "n_estimators"):
+        return shap.TreeExplainer(model, data=background.data, feature_perturbation="interventional")
+    if hasattr(model, "coef_"):
+        mean = np.average(background.data, axis=0, weights=weights)
+        covariance = np.atleast_2d(np.cov(background.data, rowvar=False, aweights=weights))
+        return shap.LinearExplainer(model, (mean, covariance))
+
+    def predict(X):
+        return model.predict(pd.DataFrame(X, columns=features))
+
+    return shap.KernelExplainer(predict, background)
+
+
+def _explain_batch(model, background, features, X, n_samples):
+    """Compute the SHAP values of a batch of rows (run in worker processes)."""
+    explainer = make_explainer(model, background, features)
+    if isinstance(explainer, shap.KernelExplainer):
+        values = explainer.shap_values(X, nsamples=n_samples, silent=True)
+    else:
+        values = explainer.shap_values(X)
+    return np.asarray(values, dtype=float).reshape(len(X), len(features))
+
+
+def compute_shap_values(model, sample, background, batch_size=10, n_jobs=None, n_samples="auto"):
+    """
+    Compute SHAP values of the sample, by batches of rows explained in parallel.
+
+    Yields:
+        The SHAP values of each group of batches computed together (one batch per worker),
+        as soon as they are available.
+    """
+    features = list(sample.columns)
+    batches = [sample.iloc[start:start + batch_size] for start in range(0, len(sample), batch_size)]
+    batches_per_round = effective_n_jobs(n_jobs)
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for start in range(0, len(batches), batches_per_round):
+            round_batches = batches[start:start + batches_per_round]
+            values = parallel(
+                delayed(_explain_batch)(model, background, features, batch.to_numpy(dtype=float), n_samples)
+                for batch in round_batches
+            )
+            yield pd.DataFrame(
+                np.concatenate(values), columns=features, index=pd.concat(round_batches).index
+            )
+
+
+def hash_rows(sample) -> Dict[str, str]:
+    """Hash each model input row, to detect the players whose explanations must be recomputed."""
+    hashes = pd.util.hash_pandas_object(sample, index=False)
+    return {key: str(value) for key, value in hashes.items()}
+
+
+def get_explanation_version(model_path, background, features: List[str]) -> str:
+    """Identify the model, background and features the SHAP values were computed with."""
+    digest = hashlib.sha1()
+    with open(model_path, "rb") as model_file:
+        digest.update(model_file.read())
+    digest.update(np.ascontiguousarray(background.data, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(background.weights, dtype=float).tobytes())
+    digest.update(json.dumps(features).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_shap_state() -> dict:
+    """Load the SHAP values computed by the previous run, with the hash of their model input rows."""
+    try:
+        with open(conf.data.shap_state.path, encoding=conf.data.shap_state.encoding) as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {}
 
-def compute_shap_values(model, sample, population):
-    """Compute SHAP values for the provided sample."""
-    explainer = shap.Explainer(model.predict, population, algorithm="auto")
-    return explainer(sample)
 
+def save_shap_state(state: dict) -> None:
+    with open(conf.data.shap_state.path, "w", encoding=conf.data.shap_state.encoding) as json_file:
+        json.dump(state, json_file, indent=conf.data.shap_state.indent)
 
-def save_shap_values(shap_values, sample, predictions):
-    """Save SHAP values to a CSV file."""
-    sample["player"] = sample.index
-    sample["player"] = sample["player"].map(predictions["PLAYER"])
-    sample = sample.reset_index(drop=True)
 
-    shap_df = pd.DataFrame(shap_values.values, columns=shap_values.feature_names, index=sample.player)
-    shap_df.to_csv(
-        conf.data.shap_values.path,
-        sep=conf.data.shap_values.sep,
-        encoding=conf.data.shap_values.encoding,
-        compression=conf.data.shap_values.compression,
-        index=True
+def save_shap_values(state, sample, predictions):
+    """Save the SHAP values of the sample rows already explained to a CSV file, in prediction order."""
+    rows = state["rows"]
+    keys = [key for key in sample.index if key in rows]
+    shap_df = pd.DataFrame(
+        [rows[key]["values"] for key in keys],
+        columns=state["features"],
+        index=pd.Index(predictions.loc[keys, "PLAYER"].to_list(), name="player")
     )
+    storage.write(shap_df, conf.data.shap_values)
+    return shap_df
 
 
 def explain_model():
     """Explain model predictions using SHAP values."""
+    explain_conf = conf.explain
     try:
         model = load.load_model()
-        model_input, predictions = load_data_and_preprocess()
-        sample, population = get_sample_and_population(model_input, predictions)
-        shap_values = compute_shap_values(model, sample, population)
-        save_shap_values(shap_values, sample, predictions)
+        pipeline = load.load_pipeline()
+        predictions = load_data_and_preprocess()
+        sample = get_sample(predictions, pipeline, sample_size=explain_conf.top_n or 50)
+        shap_background = load.load_shap_background()
+        background = shap_background["background"]
+
+        features = list(sample.columns)
+        version = get_explanation_version(conf.data.model.path, background, features)
+        if version != shap_background["version"]:
+            raise ValueError("SHAP background was built for another model or features, the model must be retrained")
+        state = load_shap_state()
+        if state.get("version") != version:
+            logger.info("Model changed, all players will be explained")
+            state = {"version": version, "features": features, "rows": {}}
+        state["base_value"] = shap_background["base_value"]
+        # Players out of the sample are forgotten
+        state["rows"] = {key: row for key, row in state["rows"].items() if key in sample.index}
+
+        hashes = hash_rows(sample)
+        changed = [key for key in sample.index if state["rows"].get(key, {}).get("hash") != hashes[key]]
+        logger.info(f"Explaining {len(changed)} players ({len(sample) - len(changed)} unchanged)")
+        for values in compute_shap_values(
+                model,
+                sample.loc[changed],
+                background,
+                batch_size=explain_conf.batch_size or 10,
+                n_jobs=explain_conf.n_jobs,
+                n_samples=explain_conf.n_samples or "auto"
+        ):
+            for key, row in values.iterrows():
+                state["rows"][key] = {"hash": hashes[key], "values": row.to_list()}
+            save_shap_state(state)
+            save_shap_values(state, sample, predictions)
+            logger.debug(f"SHAP values saved for {len(state['rows'])}/{len(sample)} players")
+        shap_values = save_shap_values(state, sample, predictions)
+        shap_history.save_day(shap_values)
     except Exception as e:
         logger.error(f"Error explaining the model: {e}")
         raise e
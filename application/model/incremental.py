@@ -0,0 +1,71 @@
+import json
+from typing import Dict, List, Tuple
+
+import numpy
+
+from application import conf
+
+
+def load_training_state() -> dict:
+    """Load the training state (model features, season hashes and fit history of the saved model)."""
+    try:
+        with open(conf.data.training_state.path, encoding=conf.data.training_state.encoding) as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_training_state(state: dict) -> None:
+    """Save the training state."""
+    with open(conf.data.training_state.path, "w", encoding=conf.data.training_state.encoding) as outfile:
+        json.dump(state, outfile, indent=conf.data.training_state.indent)
+
+
+def get_changed_seasons(previous_hashes: Dict[str, str], hashes: Dict[int, str]) -> List[int]:
+    """
+    List the seasons whose training rows changed since the saved model was trained.
+
+    Args:
+        previous_hashes: Season hashes recorded in the training state (JSON keys are strings).
+        hashes: Current season hashes.
+
+    Returns:
+        Added, removed and modified seasons, sorted.
+    """
+    seasons = set(int(season) for season in previous_hashes) | set(hashes)
+    return sorted(
+        season
+        for season in seasons
+        if previous_hashes.get(str(season)) != hashes.get(season)
+    )
+
+
+def continue_training(regressor, X, y, max_epochs: int) -> Tuple[bool, int]:
+    """
+    Continue training a fitted regressor with `partial_fit` epochs, from its current weights.
+
+    Training stops once the loss has not improved by at least the regressor `tol`
+    for `n_iter_no_change` consecutive epochs, as in a regular fit.
+
+    Args:
+        regressor: Fitted regressor supporting `partial_fit` (e.g. a MLPRegressor).
+        X: Features, as a DataFrame with the columns the regressor was fitted with.
+        y: Target.
+        max_epochs: Maximum number of epochs.
+
+    Returns:
+        Whether training converged within `max_epochs`, and the number of epochs run.
+    """
+    y = numpy.asarray(y, dtype=float)
+    best_loss = numpy.inf
+    no_improvement_count = 0
+    for epoch in range(1, max_epochs + 1):
+        regressor.partial_fit(X, y)
+        if regressor.loss_ > best_loss - regressor.tol:
+            no_improvement_count += 1
+        else:
+            no_improvement_count = 0
+        best_loss = min(best_loss, regressor.loss_)
+        if no_improvement_count >= regressor.n_iter_no_change:
+            return True, epoch
+    return False, max_epochs
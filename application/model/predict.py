@@ -1,10 +1,9 @@
 from datetime import datetime
-import json
 
 import pandas as pd
 
-from application import conf, logger, data_preprocess
-from application.utils import load
+from application import conf, logger
+from application.utils import load, storage
 from application.model import train
 
 
@@ -15,17 +14,32 @@ def get_current_season():
     return datetime.now().year
 
 
-def load_and_preprocess_data(current_season):
-    """Load and preprocess data for the current season."""
-    data = load.load_silver_data().fillna(0.0)
-    data = data[data.SEASON == current_season]
-    with open("data/features.json") as json_file:
-        features_dict = json.load(json_file)
-    cat, num, features = features_dict["cat"], features_dict["num"], features_dict["model"]
-    data_processed_features_only, _ = data_preprocess.scale_per_value_of(
-        data, cat, num, data["SEASON"], min_max_scaler=False
+def build_season_data(season):
+    """
+    Build the silver rows of a single season directly from the raw tables.
+
+    Bronze merges and silver filters only involve rows of the same season, so reading
+    the rows of that season only gives the same rows as the full training build.
+    """
+    seasons = [season]
+    bronze = train.build_bronze_data(
+        load.load_player_stats(seasons=seasons),
+        load.load_mvp_votes(seasons=seasons),
+        load.load_team_standings(seasons=seasons)
     )
-    return data_processed_features_only[features]
+    return train.build_silver_data(bronze).fillna(0.0)
+
+
+def load_and_preprocess_data(current_season, data=None, pipeline=None):
+    """Preprocess data for the current season, built from raw tables if not given."""
+    if data is None:
+        data = build_season_data(current_season)
+    if pipeline is None:
+        pipeline = load.load_pipeline()
+    # Scaling statistics of the current season are refitted as its rows change every day
+    X = pipeline.transform(data, refit_groups=[current_season])
+    pipeline.save(conf.data.pipeline.path)
+    return X
 
 
 def append_history(data, history):
@@ -36,14 +50,8 @@ def append_history(data, history):
     if today in history.DATE.unique():
         logger.warning("Predictions already made for today")
     else:
-        history = history.append(data, ignore_index=True)
-        history.to_csv(
-            conf.data.history.path,
-            sep=conf.data.history.sep,
-            encoding=conf.data.history.encoding,
-            compression=conf.data.history.compression,
-            index=False
-        )
+        history = pd.concat([history, data], ignore_index=True)
+        storage.write(history, conf.data.history, index=False)
 
 
 def load_model_make_predictions(max_n=50):
@@ -52,29 +60,15 @@ def load_model_make_predictions(max_n=50):
     current_season = get_current_season()
     logger.debug(f"Current season: {current_season}")
 
-    # Load and preprocess data
-    original_data = load.load_silver_data().fillna(0.0)
-    original_data = original_data[original_data.SEASON == current_season]
-    X = load_and_preprocess_data(current_season)
-    X.to_csv(
-        conf.data.model_input.path,
-        sep=conf.data.model_input.sep,
-        encoding=conf.data.model_input.encoding,
-        compression=conf.data.model_input.compression,
-        index=True
-    )
+    # Build and preprocess the rows of the current season only
+    original_data = build_season_data(current_season)
+    X = load_and_preprocess_data(current_season, original_data)
 
     predictions = model.predict(X)
     original_data.loc[:, "PRED"] = predictions
     original_data.loc[:, "PRED_RANK"] = original_data["PRED"].rank(ascending=False)
     original_data = original_data[original_data["PRED"] > 0.0].sort_values(by="PRED", ascending=False).head(max_n)
-    original_data.to_csv(
-        conf.data.predictions.path,
-        sep=conf.data.predictions.sep,
-        encoding=conf.data.predictions.encoding,
-        compression=conf.data.predictions.compression,
-        index=True
-    )
+    storage.write(original_data, conf.data.predictions)
 
     try:
         history = load.load_history()
@@ -88,8 +82,6 @@ def load_model_make_predictions(max_n=50):
 def make_predictions():
     """Main function to make predictions using the trained model."""
     try:
-        train.make_bronze_data()
-        train.make_silver_data()
         load_model_make_predictions()
     except Exception as e:
         logger.error(f"Predicting failed: {e}", exc_info=True)
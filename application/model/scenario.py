@@ -0,0 +1,159 @@
+import itertools
+import re
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy
+import pandas as pd
+
+from application import conf, logger
+from application.model import predict
+from application.utils import load, storage
+
+# Characters removed from player names by the scrapper
+PLAYER_NAME_STRIPPED_CHARACTERS = re.compile(r"[ _'.*]")
+
+
+def normalize_player_name(name: str) -> str:
+    """
+    Normalize a player name for lookups, e.g. "Nikola Jokic" and "NikolaJokić" both give "nikolajokic".
+
+    Characters removed by the scrapper are stripped, accents are folded and case is ignored.
+    """
+    name = PLAYER_NAME_STRIPPED_CHARACTERS.sub("", unicodedata.normalize("NFKD", str(name)))
+    return "".join(c for c in name if not unicodedata.combining(c)).casefold()
+
+
+def build_scenario_grid(perturbations: Dict[str, Sequence[float]]) -> Tuple[List[str], numpy.ndarray]:
+    """
+    Build every combination of the given feature perturbations.
+
+    Args:
+        perturbations: Values added to each perturbed column, e.g. {"PTS_per_game": [-2, 0, 2]}.
+
+    Returns:
+        The perturbed columns, and the deltas of each scenario (one row per scenario).
+    """
+    columns = list(perturbations)
+    if not columns:
+        return columns, numpy.zeros((1, 0))
+    deltas = numpy.array(list(itertools.product(*(perturbations[col] for col in columns))), dtype=float)
+    return columns, deltas
+
+
+class ScenarioEngine:
+    """
+    Score what-if scenarios of player stat lines against the rest of a season.
+
+    The baseline (model inputs and predictions of every player of the season) is built
+    once. Scenarios shift the scaled model inputs of the chosen players by their deltas
+    divided by the season scale of each column, i.e. with the scaling statistics of
+    the season frozen, so that all scenarios are scored in a single `model.predict` call.
+    Each scenario is ranked against the baseline predictions of the other players.
+    """
+
+    def __init__(self, season: Optional[int] = None, data: Optional[pd.DataFrame] = None, model=None, pipeline=None):
+        """
+        Args:
+            season: Season of the scenarios (current season by default).
+            data: Silver rows of the season (built from raw tables by default).
+            model: Trained model (loaded by default).
+            pipeline: Fitted preprocessing pipeline (loaded by default).
+        """
+        self.season = season or predict.get_current_season()
+        self.data = data if data is not None else predict.build_season_data(self.season)
+        self.model = model if model is not None else load.load_model()
+        self.pipeline = pipeline if pipeline is not None else load.load_pipeline()
+        # Same scaling statistics as the predictions of the season
+        X = self.pipeline.transform(self.data, refit_groups=[self.season])
+        self.features = list(X.columns)
+        self.X = X.to_numpy(dtype=float)
+        self.scale = self.pipeline.scaler.scale_.loc[self.season]
+        self.predictions = self.model.predict(X)
+        self._sorted_predictions = numpy.sort(self.predictions)
+
+    def _feature_shifts(self, columns: List[str], deltas: numpy.ndarray) -> numpy.ndarray:
+        """Convert deltas of silver columns into shifts of the scaled model inputs."""
+        shifts = numpy.zeros((len(deltas), len(self.features)))
+        for position, column in enumerate(columns):
+            if column not in self.data.columns:
+                raise ValueError(f"Unknown column {column}")
+            if column not in self.features:
+                logger.warning(f"{column} is not used by the model, its perturbations have no effect")
+                continue
+            shifts[:, self.features.index(column)] = deltas[:, position] / self.scale[column]
+        return shifts
+
+    def rank(self, predictions: numpy.ndarray, baseline: numpy.ndarray) -> numpy.ndarray:
+        """
+        Rank predictions among the baseline predictions of the other players of the season.
+
+        Args:
+            predictions: Predictions of perturbed rows.
+            baseline: Baseline prediction of the player of each perturbed row.
+
+        Returns:
+            Ranks (1 for the highest prediction, ties averaged as in the predictions).
+        """
+        n_players = len(self._sorted_predictions)
+        n_lower_or_equal = numpy.searchsorted(self._sorted_predictions, predictions, side="right")
+        n_lower = numpy.searchsorted(self._sorted_predictions, predictions, side="left")
+        # The baseline of the perturbed player is replaced by its scenario
+        n_higher = n_players - n_lower_or_equal - (baseline > predictions)
+        n_equal = n_lower_or_equal - n_lower - (baseline == predictions)
+        return 1 + n_higher + n_equal / 2
+
+    def evaluate(self, players: List[str], perturbations: Dict[str, Sequence[float]]) -> pd.DataFrame:
+        """
+        Score every combination of perturbations for each given player.
+
+        Args:
+            players: Names of the perturbed players (all their rows of the season), as written
+                or as stored (see normalize_player_name).
+            perturbations: Values added to each perturbed column, e.g. {"PTS_per_game": [-2, 0, 2]}.
+
+        Returns:
+            One row per player row and scenario: the player, the delta of each perturbed
+            column, the baseline and scenario predictions and ranks.
+        """
+        requested = {normalize_player_name(player): player for player in players}
+        stored = self.data["PLAYER"].map(normalize_player_name)
+        positions = numpy.flatnonzero(stored.isin(list(requested)).to_numpy())
+        missing_players = {
+            player for name, player in requested.items() if name not in set(stored.iloc[positions])
+        }
+        if missing_players:
+            raise ValueError(f"Players not found in season {self.season}: {', '.join(sorted(missing_players))}")
+        columns, deltas = build_scenario_grid(perturbations)
+        shifts = self._feature_shifts(columns, deltas)
+
+        # (player row, scenario) pairs, player rows first
+        X = (self.X[positions][:, None, :] + shifts[None, :, :]).reshape(-1, len(self.features))
+        predictions = self.model.predict(pd.DataFrame(X, columns=self.features))
+        baseline = numpy.repeat(self.predictions[positions], len(deltas))
+        base_ranks = pd.Series(self.predictions).rank(ascending=False).to_numpy()
+
+        results = pd.DataFrame({
+            "PLAYER": numpy.repeat(self.data["PLAYER"].to_numpy()[positions], len(deltas)),
+            "TEAM": numpy.repeat(self.data["TEAM"].to_numpy()[positions], len(deltas)),
+        })
+        for position, column in enumerate(columns):
+            results[f"{column}_DELTA"] = numpy.tile(deltas[:, position], len(positions))
+        results["BASE_PRED"] = baseline
+        results["BASE_PRED_RANK"] = numpy.repeat(base_ranks[positions], len(deltas))
+        results["PRED"] = predictions
+        results["PRED_DELTA"] = predictions - baseline
+        results["PRED_RANK"] = self.rank(predictions, baseline)
+        return results
+
+
+def run_scenarios(players: List[str], perturbations: Dict[str, Sequence[float]], season: Optional[int] = None) -> pd.DataFrame:
+    """Evaluate what-if scenarios of some players and save them."""
+    engine = ScenarioEngine(season=season)
+    start = time.perf_counter()
+    results = engine.evaluate(players, perturbations)
+    elapsed = time.perf_counter() - start
+    logger.info(f"{len(results)} scenarios evaluated in {elapsed * 1000:.1f}ms")
+    storage.write(results, conf.data.scenarios, index=False)
+    return results
@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Tuple
+
+import pandas
+from sklearn import base, ensemble, linear_model, neural_network, pipeline
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
+
+from application import conf, logger
+from application.model import validation
+from application.utils import storage
+
+REGRESSORS = {
+    "MLPRegressor": neural_network.MLPRegressor,
+    "GradientBoostingRegressor": ensemble.GradientBoostingRegressor,
+    "RandomForestRegressor": ensemble.RandomForestRegressor,
+    "Ridge": linear_model.Ridge
+}
+REGRESSOR_STEP = "regressor"
+RESULT_COLUMNS = [
+    "iter",
+    "n_resources",
+    "params",
+    "mean_test_score",
+    "std_test_score",
+    "mean_train_score",
+    "mean_fit_time",
+    "rank_test_score"
+]
+
+
+def _to_param_value(value: Any) -> Any:
+    """Convert YAML lists (e.g. hidden layer sizes) to tuples, as expected by estimators."""
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def get_param_grid(search_space: List[dict]) -> List[Dict[str, list]]:
+    """
+    Build the parameter grid of the search from the configured search space.
+
+    Args:
+        search_space: Entries of `train.search.space`, each with the name of a regressor
+            (see REGRESSORS), its fixed parameters and the values to try for the others.
+
+    Returns:
+        One grid per regressor, on the regressor step of a pipeline.
+    """
+    param_grid = []
+    for candidate in search_space:
+        regressor_class = REGRESSORS.get(candidate["regressor"])
+        if regressor_class is None:
+            raise ValueError(f"Unknown regressor {candidate['regressor']} in search space")
+        fixed_params = {key: _to_param_value(value) for key, value in (candidate.get("fixed") or {}).items()}
+        grid = {REGRESSOR_STEP: [regressor_class(**fixed_params)]}
+        for param, values in (candidate.get("grid") or {}).items():
+            grid[f"{REGRESSOR_STEP}__{param}"] = [_to_param_value(value) for value in values]
+        param_grid.append(grid)
+    return param_grid
+
+
+def search_regressor(cv: validation.SeasonCrossValidator) -> Tuple[Any, pandas.DataFrame]:
+    """
+    Search the best regressor and hyperparameters by successive halving.
+
+    All candidates are first evaluated on a small sample of the rows, and only the
+    best third (by default) of them is evaluated again with three times more rows,
+    until the whole data. Validation folds hold out whole seasons, so that no season
+    is in both the training and validation rows. Fold indices and feature matrices
+    are built once and shared by every candidate, evaluated in parallel.
+
+    Args:
+        cv: Cross-validation engine of the training data.
+
+    Returns:
+        The best regressor (unfitted) and the results of every evaluated candidate.
+    """
+    search_conf = conf.train.search
+    folds = cv.k_folds(n_splits=search_conf.n_splits or 5)
+    estimator = pipeline.Pipeline([(REGRESSOR_STEP, neural_network.MLPRegressor())])
+    searcher = HalvingGridSearchCV(
+        estimator,
+        get_param_grid(search_conf.space),
+        factor=search_conf.factor or 3,
+        cv=folds,
+        scoring=search_conf.scoring or "neg_mean_absolute_error",
+        refit=False,
+        random_state=0,
+        n_jobs=conf.train.n_jobs
+    )
+    searcher.fit(cv.X, cv.y)
+
+    results = pandas.DataFrame(searcher.cv_results_)[RESULT_COLUMNS]
+    results["params"] = results["params"].astype(str)
+    results = results.sort_values(by=["iter", "rank_test_score"], ascending=[False, True])
+    storage.write(results, conf.data.search_results, index=False)
+
+    best_regressor = base.clone(estimator).set_params(**searcher.best_params_).named_steps[REGRESSOR_STEP]
+    logger.info(f"Best regressor : {best_regressor} (score {searcher.best_score_:.5f})")
+    return base.clone(best_regressor), results
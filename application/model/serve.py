@@ -0,0 +1,278 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy
+import pandas as pd
+from scipy import stats
+
+from application import conf, logger
+from application.utils import load
+
+
+class InvalidRowsError(ValueError):
+    """Raised when the rows of a request cannot be scored."""
+
+
+class LatencyMetrics:
+    """Thread-safe latency and throughput statistics of the served requests."""
+
+    def __init__(self, window: int = 10000):
+        """
+        Args:
+            window: Number of most recent requests used for latency percentiles.
+        """
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._requests = 0
+        self._rows = 0
+        self._errors = 0
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_request(self, latency: float, n_rows: int) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._requests += 1
+            self._rows += n_rows
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._errors += 1
+
+    def record_batch(self, n_requests: int) -> None:
+        with self._lock:
+            self._batch_sizes.append(n_requests)
+
+    def summary(self) -> dict:
+        """Return request counts, latency percentiles (ms) and throughput since start."""
+        with self._lock:
+            latencies = numpy.array(self._latencies) * 1000
+            batch_sizes = numpy.array(self._batch_sizes)
+            uptime = time.monotonic() - self._started_at
+            summary = {
+                "requests": self._requests,
+                "rows": self._rows,
+                "errors": self._errors,
+                "uptime_seconds": round(uptime, 3),
+                "requests_per_second": round(self._requests / uptime, 3) if uptime > 0 else 0.0,
+                "rows_per_second": round(self._rows / uptime, 3) if uptime > 0 else 0.0,
+                "mean_requests_per_batch": round(float(batch_sizes.mean()), 3) if len(batch_sizes) else None
+            }
+        for percentile in (50, 95, 99):
+            summary[f"latency_p{percentile}_ms"] = (
+                round(float(numpy.percentile(latencies, percentile)), 3) if len(latencies) else None
+            )
+        return summary
+
+
+class BatchScorer:
+    """
+    Score player rows with the model and preprocessing pipeline kept in memory.
+
+    Requests are queued and a single worker thread scores every request received
+    within `batch_window` seconds of the first one (up to `max_batch_rows` rows) with
+    one pipeline transform and one `model.predict` call, then hands each request its
+    own predictions.
+    """
+
+    def __init__(self, model, pipeline, batch_window: float = 0.002, max_batch_rows: int = 5000):
+        self.model = model
+        self.pipeline = pipeline
+        self.batch_window = batch_window
+        self.max_batch_rows = max_batch_rows
+        self.metrics = LatencyMetrics(window=conf.serve.metrics_window or 10000)
+        self._required_columns = list(dict.fromkeys(
+            pipeline.num_features + pipeline.cat_features + [pipeline.group_by]
+        ))
+        self._num_features = set(pipeline.num_features)
+        self._known_groups = set(pipeline.scaler.offset_.index.tolist())
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="batch-scorer", daemon=True)
+        self._worker.start()
+
+    def rows_from_records(self, records: List[dict]) -> Dict[str, numpy.ndarray]:
+        """
+        Build the rows to score from JSON records, as arrays of the columns used by the model.
+
+        Missing numerical values are filled with zeros, as the predict job does.
+
+        Raises:
+            InvalidRowsError: If a column used by the model is missing from every record,
+                or if a row belongs to a season without scaling statistics.
+        """
+        rows = {}
+        for col in self._required_columns:
+            values = [record.get(col) for record in records]
+            if all(value is None for value in values):
+                raise InvalidRowsError(f"Missing column: {col}")
+            if col in self._num_features:
+                values = numpy.array(values, dtype=float)
+                values[numpy.isnan(values)] = 0.0
+            else:
+                values = numpy.array(values, dtype=object)
+            rows[col] = values
+        # Scaling statistics are only those fitted by training and the last predict job,
+        # so that the predictions of a row do not depend on the other rows of its batch
+        unknown_groups = set(rows[self.pipeline.group_by].tolist()) - self._known_groups
+        if unknown_groups:
+            raise InvalidRowsError(f"No scaling statistics for {self.pipeline.group_by} {sorted(unknown_groups)}")
+        return rows
+
+    def submit(self, rows: Dict[str, numpy.ndarray]) -> futures.Future:
+        """Queue rows for scoring, returning the future of their predictions."""
+        future = futures.Future()
+        self._queue.put((rows, len(rows[self.pipeline.group_by]), future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            n_rows = batch[0][1]
+            deadline = time.monotonic() + self.batch_window
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                n_rows += item[1]
+            self._score_batch(batch)
+
+    def _score_batch(self, batch: List[tuple]) -> None:
+        self.metrics.record_batch(len(batch))
+        try:
+            data = batch[0][0]
+            if len(batch) > 1:
+                data = {col: numpy.concatenate([rows[col] for rows, _, _ in batch]) for col in data}
+            X = pd.DataFrame(self.pipeline.transform_array(data), columns=self.pipeline.model_features_)
+            predictions = self.model.predict(X)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for _, n_rows, future in batch:
+            future.set_result(predictions[start:start + n_rows])
+            start += n_rows
+
+    def score(self, records: List[dict], timeout: Optional[float] = None) -> List[dict]:
+        """
+        Score player rows, ranking them within their season among the rows of the request.
+
+        Args:
+            records: Silver rows, as mappings of column names to values.
+            timeout: Maximum number of seconds to wait for the predictions.
+
+        Returns:
+            PLAYER, SEASON, PRED and PRED_RANK of each row, in request order.
+        """
+        start = time.perf_counter()
+        rows = self.rows_from_records(records)
+        predictions = self.submit(rows).result(timeout=timeout)
+        seasons = rows[self.pipeline.group_by]
+        ranks = numpy.empty(len(predictions))
+        for season in numpy.unique(seasons):
+            in_season = seasons == season
+            ranks[in_season] = stats.rankdata(-predictions[in_season])
+        results = [
+            {"PLAYER": record.get("PLAYER"), "SEASON": season, "PRED": pred, "PRED_RANK": rank}
+            for record, season, pred, rank in zip(records, seasons.tolist(), predictions.tolist(), ranks.tolist())
+        ]
+        self.metrics.record_request(time.perf_counter() - start, len(records))
+        return results
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the prediction server.
+
+    POST /predict: JSON body {"rows": [{column: value, ...}, ...]} of silver rows,
+    answered with {"predictions": [{"PLAYER", "SEASON", "PRED", "PRED_RANK"}, ...]}.
+    GET /metrics: latency and throughput statistics.
+    GET /health: liveness check.
+    """
+
+    scorer: BatchScorer = None
+    request_timeout = 30.0
+    # Keep connections alive between the requests of a client, and send responses
+    # without waiting for the acknowledgement of previous packets
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.scorer.metrics.summary())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            records = body.get("rows") if isinstance(body, dict) else body
+            if not records or not isinstance(records, list):
+                raise InvalidRowsError("No rows to score")
+            results = self.scorer.score(records, timeout=self.request_timeout)
+        except ValueError as e:
+            self.scorer.metrics.record_error()
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.scorer.metrics.record_error()
+            logger.error(f"Scoring failed: {e}", exc_info=True)
+            self._send_json(500, {"error": "Scoring failed"})
+            return
+        self._send_json(200, {"predictions": results})
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def make_server(host: Optional[str] = None, port: Optional[int] = None) -> ThreadingHTTPServer:
+    """Load the model and preprocessing pipeline, and build the prediction server."""
+    model = load.load_model()
+    pipeline = load.load_pipeline()
+    if list(getattr(model, "feature_names_in_", pipeline.model_features_)) != pipeline.model_features_:
+        raise ValueError("Model and preprocessing pipeline were not trained together")
+    scorer = BatchScorer(
+        model,
+        pipeline,
+        batch_window=(conf.serve.batch_window_ms or 2) / 1000,
+        max_batch_rows=conf.serve.max_batch_rows or 5000
+    )
+    handler = type("Handler", (PredictionRequestHandler,), {"scorer": scorer})
+    return ThreadingHTTPServer((host or conf.serve.host, port or conf.serve.port), handler)
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Run the prediction server until interrupted."""
+    server = make_server(host, port)
+    logger.info(f"Serving predictions on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
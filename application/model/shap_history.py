@@ -0,0 +1,150 @@
+import io
+import os
+import re
+import zipfile
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from application import conf, logger
+
+DATE_FORMAT = "%Y-%m-%d"
+DAY_FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})\.parquet$")
+MOVERS_COLUMNS = ["PLAYER", "FEATURE", "START", "END", "DELTA"]
+
+
+class ShapHistory:
+    """
+    Append-only history of the SHAP values of each player, one Parquet file per day.
+
+    Each day file holds the float32 SHAP vector of every explained player of that day,
+    indexed by player. Queries only read the files of the days they compare. The history
+    is read from its directory, or from a zip archive of it (the workflow artifact)
+    kept compressed in memory.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Directory of the day files, or zip archive of them.
+        """
+        self.path = path
+        self._archive = None
+        if zipfile.is_zipfile(path):
+            with open(path, "rb") as archive_file:
+                self._archive = zipfile.ZipFile(io.BytesIO(archive_file.read()))
+            file_names = self._archive.namelist()
+        else:
+            file_names = os.listdir(path) if os.path.isdir(path) else []
+        self._files = {}
+        for file_name in file_names:
+            match = DAY_FILE_PATTERN.match(os.path.basename(file_name))
+            if match:
+                self._files[date.fromisoformat(match.group(1))] = file_name
+
+    def dates(self) -> List[date]:
+        """Return the days of the history, in chronological order."""
+        return sorted(self._files)
+
+    def read_day(self, day: date) -> pd.DataFrame:
+        """Return the SHAP values of the players explained on a given day (players as index)."""
+        file_name = self._files.get(day)
+        if file_name is None:
+            raise KeyError(f"No SHAP values for {day}")
+        if self._archive is not None:
+            with self._archive.open(file_name) as day_file:
+                return pd.read_parquet(io.BytesIO(day_file.read()))
+        return pd.read_parquet(os.path.join(self.path, file_name))
+
+    def append(self, day: date, shap_values: pd.DataFrame) -> bool:
+        """
+        Add the SHAP values of a day, unless the history already has values for that day.
+
+        Args:
+            day: Day of the SHAP values.
+            shap_values: SHAP values, one row per player (players as index).
+
+        Returns:
+            bool: Whether the day was added.
+        """
+        if self._archive is not None:
+            raise ValueError("A SHAP history archive cannot be appended to")
+        if day in self._files:
+            logger.warning(f"SHAP values already saved for {day}")
+            return False
+        os.makedirs(self.path, exist_ok=True)
+        file_name = f"{day.strftime(DATE_FORMAT)}.parquet"
+        day_values = shap_values.astype(np.float32)
+        day_values.index = day_values.index.rename("PLAYER")
+        # Written under a temporary name first, so that a day file is always complete
+        temporary_path = os.path.join(self.path, f".{file_name}")
+        day_values.to_parquet(temporary_path, compression=conf.data.shap_history.compression)
+        os.replace(temporary_path, os.path.join(self.path, file_name))
+        self._files[day] = file_name
+        return True
+
+    def get_day(self, day: date, before: bool = False) -> Optional[date]:
+        """Return the first day of the history from the given day (or the last day up to it)."""
+        days = self.dates()
+        if before:
+            days = [d for d in days if d <= day]
+            return days[-1] if days else None
+        days = [d for d in days if d >= day]
+        return days[0] if days else None
+
+    def top_movers(
+            self,
+            since: date,
+            until: Optional[date] = None,
+            n: Optional[int] = 10,
+            players: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Find the largest changes of feature contributions between two days.
+
+        Only the files of the two compared days are read: the first day of the history
+        from `since`, and the last day up to `until` (the last day by default).
+
+        Args:
+            since: Start of the period.
+            until: End of the period.
+            n: Number of (player, feature) changes to return, the largest in absolute value
+                first (all if None).
+            players: Players to compare (all players explained on both days by default).
+
+        Returns:
+            Player, feature, contribution on both days and change of contribution.
+        """
+        start_day = self.get_day(since)
+        end_day = self.get_day(until, before=True) if until is not None else (self.dates() or [None])[-1]
+        if start_day is None or end_day is None or start_day > end_day:
+            return pd.DataFrame(columns=MOVERS_COLUMNS)
+        start, end = self.read_day(start_day), self.read_day(end_day)
+        # Players traded during the period keep their first row of each day
+        start = start[~start.index.duplicated()]
+        end = end[~end.index.duplicated()]
+        common_players = start.index.intersection(end.index)
+        if players is not None:
+            common_players = common_players.intersection(pd.Index(players))
+        common_features = start.columns.intersection(end.columns)
+        start_values = start.loc[common_players, common_features].to_numpy()
+        end_values = end.loc[common_players, common_features].to_numpy()
+        deltas = (end_values - start_values).ravel()
+        order = np.argsort(-np.abs(deltas), kind="stable")
+        if n is not None:
+            order = order[:n]
+        player_positions, feature_positions = np.divmod(order, len(common_features))
+        return pd.DataFrame({
+            "PLAYER": common_players.to_numpy()[player_positions],
+            "FEATURE": common_features.to_numpy()[feature_positions],
+            "START": start_values.ravel()[order],
+            "END": end_values.ravel()[order],
+            "DELTA": deltas[order]
+        })
+
+
+def save_day(shap_values: pd.DataFrame, day: Optional[date] = None) -> bool:
+    """Append the SHAP values of a day (today by default) to the configured SHAP history."""
+    return ShapHistory(conf.data.shap_history.path).append(day or date.today(), shap_values)
@@ -0,0 +1,174 @@
+import time
+from typing import Optional
+
+import numpy
+import pandas as pd
+
+from application import conf, logger
+from application.model.scenario import ScenarioEngine
+from application.utils import storage
+
+# Team record columns, recomputed from the simulated wins and losses
+TEAM_RECORD_COLUMNS = ("W", "L", "W/L%", "PW", "PL")
+# Games columns, recomputed from the simulated games played
+GAMES_COLUMNS = ("G", "GS")
+# Columns growing with the games of the season
+COUNT_COLUMNS = ("W", "L", "PW", "PL") + GAMES_COLUMNS
+
+
+class SeasonSimulator(ScenarioEngine):
+    """
+    Monte Carlo simulation of the rest of a season for its top MVP candidates.
+
+    Each simulation samples the remaining games of every team (binomial wins at the
+    current winning percentage), the games each candidate plays (binomial, at their
+    current availability) and the averages of their rate stats over the season
+    (current average plus the noise of the remaining games). Cumulative stats are
+    extrapolated to the simulated games played, and other configured columns are kept.
+    Simulated lines are scored with the scaling statistics of the season frozen, as
+    what-if scenarios, by chunks of simulations in one `model.predict` call each.
+    """
+
+    def __init__(self, season: Optional[int] = None, data: Optional[pd.DataFrame] = None, model=None, pipeline=None,
+                 top_n: int = 50):
+        """
+        Args:
+            season: Simulated season (current season by default).
+            data: Silver rows of the season (built from raw tables by default).
+            model: Trained model (loaded by default).
+            pipeline: Fitted preprocessing pipeline (loaded by default).
+            top_n: Number of candidates (players with the highest predictions) simulated.
+        """
+        super().__init__(season=season, data=data, model=model, pipeline=pipeline)
+        self.candidates = numpy.argsort(-self.predictions, kind="stable")[:top_n]
+        self.candidate_data = self.data.iloc[self.candidates]
+        self.simulate_conf = conf.simulate
+        wins = self.candidate_data["W"].to_numpy(dtype=float)
+        self.games_played = wins + self.candidate_data["L"].to_numpy(dtype=float)
+        self.remaining_games = numpy.clip(self.simulate_conf.season_games - self.games_played, 0, None).astype(int)
+        # Counts at the end of the season are compared to the current counts of the other
+        # players as if the whole league kept its pace, as scaling statistics are frozen
+        league_games_played = (self.data["W"] + self.data["L"]).median()
+        self.season_progress = min(max(league_games_played / self.simulate_conf.season_games, 1e-3), 1.0)
+        # Wins are sampled once per team, for all its candidates
+        _, team_positions, self.team_codes = numpy.unique(
+            self.candidate_data["TEAM"].to_numpy(dtype=str), return_index=True, return_inverse=True
+        )
+        self.team_remaining_games = self.remaining_games[team_positions]
+        self.team_win_rate = numpy.divide(
+            wins[team_positions],
+            self.games_played[team_positions],
+            out=numpy.full(len(team_positions), 0.5),
+            where=self.games_played[team_positions] > 0
+        )
+        self.availability = numpy.clip(
+            numpy.divide(
+                self.candidate_data["G"].to_numpy(dtype=float),
+                self.games_played,
+                out=numpy.ones(len(self.candidates)),
+                where=self.games_played > 0
+            ),
+            0.0, 1.0
+        )
+
+    def _sample_chunk(self, rng: numpy.random.Generator, n_simulations: int) -> numpy.ndarray:
+        """Sample the model inputs of the candidates, shape (simulations, candidates, features)."""
+        n_candidates = len(self.candidates)
+        shape = (n_simulations, n_candidates)
+        team_wins = rng.binomial(
+            self.team_remaining_games, self.team_win_rate, size=(n_simulations, len(self.team_win_rate))
+        )
+        wins = team_wins[:, self.team_codes]
+        current = self.candidate_data
+        W = current["W"].to_numpy(dtype=float) + wins
+        L = current["L"].to_numpy(dtype=float) + self.remaining_games - wins
+        G = current["G"].to_numpy(dtype=float)
+        games_rest = rng.binomial(self.remaining_games, self.availability, size=shape)
+        final_games = G + games_rest
+        season_games_ratio = (W + L) / numpy.where(self.games_played > 0, self.games_played, 1.0)
+        played_games_ratio = final_games / numpy.where(G > 0, G, 1.0)
+        # Standard deviation of a season average around the current one, relative to it
+        rate_noise = (
+            self.simulate_conf.stat_noise * numpy.sqrt(games_rest) / numpy.where(final_games > 0, final_games, 1.0)
+        )
+
+        X = numpy.broadcast_to(self.X[self.candidates], shape + (len(self.features),)).copy()
+        for position, feature in enumerate(self.features):
+            if feature not in self.scale.index or feature in self.simulate_conf.fixed_columns:
+                continue
+            values = current[feature].to_numpy(dtype=float)
+            if feature == "W":
+                final = W
+            elif feature == "L":
+                final = L
+            elif feature == "W/L%":
+                final = W / numpy.where(W + L > 0, W + L, 1.0)
+            elif feature in TEAM_RECORD_COLUMNS:
+                final = values * season_games_ratio
+            elif feature == "G":
+                final = final_games
+            elif feature in GAMES_COLUMNS or feature in self.simulate_conf.cumulative_columns:
+                final = values * played_games_ratio
+            else:
+                final = values + rng.standard_normal(shape) * numpy.abs(values) * rate_noise
+            if feature in COUNT_COLUMNS or feature in self.simulate_conf.cumulative_columns:
+                final = final * self.season_progress
+            X[:, :, position] += (final - values) / self.scale[feature]
+        return X
+
+    def run(self, n_simulations: int, chunk_size: int = 5000, seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        Simulate the rest of the season.
+
+        Args:
+            n_simulations: Number of simulated seasons.
+            chunk_size: Number of simulations sampled and scored together.
+            seed: Seed of the random generator.
+
+        Returns:
+            For each candidate: its current prediction, its probability to finish first
+            (MVP), in the top 3, and its average rank among the candidates.
+        """
+        rng = numpy.random.default_rng(seed)
+        n_candidates = len(self.candidates)
+        first_counts = numpy.zeros(n_candidates)
+        top_3_counts = numpy.zeros(n_candidates)
+        rank_sums = numpy.zeros(n_candidates)
+        for start in range(0, n_simulations, chunk_size):
+            n_chunk = min(chunk_size, n_simulations - start)
+            X = self._sample_chunk(rng, n_chunk).reshape(-1, len(self.features))
+            predictions = self.model.predict(pd.DataFrame(X, columns=self.features)).reshape(n_chunk, n_candidates)
+            ranks = numpy.argsort(numpy.argsort(-predictions, axis=1), axis=1) + 1
+            first_counts += (ranks == 1).sum(axis=0)
+            top_3_counts += (ranks <= 3).sum(axis=0)
+            rank_sums += ranks.sum(axis=0)
+
+        results = pd.DataFrame({
+            "PLAYER": self.candidate_data["PLAYER"].to_numpy(),
+            "TEAM": self.candidate_data["TEAM"].to_numpy(),
+            "PRED": self.predictions[self.candidates],
+            "MVP_PROBABILITY": first_counts / n_simulations,
+            "TOP_3_PROBABILITY": top_3_counts / n_simulations,
+            "MEAN_RANK": rank_sums / n_simulations
+        }, index=self.candidate_data.index)
+        return results.sort_values(by=["MVP_PROBABILITY", "PRED"], ascending=False)
+
+
+def run_simulations(
+        n_simulations: Optional[int] = None, top_n: Optional[int] = None, seed: Optional[int] = None
+) -> pd.DataFrame:
+    """Simulate the rest of the current season and save the MVP probabilities of its candidates."""
+    simulate_conf = conf.simulate
+    n_simulations = n_simulations or simulate_conf.n_simulations
+    simulator = SeasonSimulator(top_n=top_n or simulate_conf.top_n)
+    start = time.perf_counter()
+    results = simulator.run(
+        n_simulations,
+        chunk_size=simulate_conf.chunk_size,
+        seed=seed if seed is not None else simulate_conf.seed
+    )
+    logger.info(
+        f"{n_simulations} simulations of {len(results)} candidates in {time.perf_counter() - start:.2f}s"
+    )
+    storage.write(results, conf.data.simulations)
+    return results
@@ -1,8 +1,9 @@
 from datetime import datetime
 import joblib
 import json
+import os
+import time
 from sklearn import (
-    model_selection,
     metrics,
     neural_network,
     base
@@ -10,17 +11,24 @@ from sklearn import (
 import pandas
 import numpy
 from application import conf, logger, data_preprocess
-from application.utils import load, analyze
+from application.utils import load, analyze, storage, util_functions
+from application.model import explain, incremental, search, validation
 
 _MIN_TARGET_CORRELATION = 0.05
 _MAX_FEATURES_CORRELATION = 0.95
-
-
-def make_bronze_data():
-    """Make bronze training data from raw downloaded data."""
-    player_stats = load.load_player_stats()
-    mvp_votes = load.load_mvp_votes()
-    team_standings = load.load_team_standings()
+_NOT_FEATURES = [
+    "PLAYER",
+    "MVP_VOTES_SHARE",
+    "MVP_WINNER",
+    "MVP_PODIUM",
+    "MVP_CANDIDATE",
+    "TEAM",
+    "SEASON",
+]
+
+
+def build_bronze_data(player_stats, mvp_votes, team_standings):
+    """Merge raw player stats, MVP votes and team standings into bronze data."""
     if mvp_votes.duplicated(subset=["PLAYER", "TEAM", "SEASON"]).sum() > 0:
         logger.warning("Duplicated rows in MVP votes!")
     bronze = (
@@ -39,67 +47,61 @@ def make_bronze_data():
         bronze[col] = bronze[col].fillna(False)
     for col in ["MVP_VOTES_SHARE"]:
         bronze[col] = bronze[col].fillna(0.0)
+    return bronze
+
+
+def make_bronze_data():
+    """Make bronze training data from raw downloaded data."""
+    bronze = build_bronze_data(
+        load.load_player_stats(), load.load_mvp_votes(), load.load_team_standings()
+    )
     logger.info(
         f'MVPs found in data : {bronze[bronze["MVP_WINNER"] == True]["SEASON"].nunique()}'
     )
-    bronze.to_csv(
-        conf.data.bronze.path,
-        sep=conf.data.bronze.sep,
-        encoding=conf.data.bronze.encoding,
-        compression=conf.data.bronze.compression,
-        index=True
-    )
+    storage.write(bronze, conf.data.bronze)
 
 
-def make_silver_data():
-    """Make silver training data from bronze data."""
-    data = load.load_bronze_data()
+def build_silver_data(data):
+    """Keep the players of bronze data meeting the silver filters (computed within each season)."""
     logger.debug(
         f"Before filters: {len(data)} players - {len(data[data.MVP_CANDIDATE])} MVP candidates - {len(data[data.MVP_WINNER])} winners"
     )
-    data_copy = data.copy()
-    # Apply filters
-    # 50% games played
-    # 50% of time played per game (24mn)
-    # Team ranked 10th in conference at least
-    for season in data.SEASON.unique():
-        max_g = data[data.SEASON == season]["G"].max()
-        threshold = 0.5 * max_g
-        data = data[
-            (data.SEASON != season) | ((data.SEASON == season) & (data.G >= threshold))
-            ]
-    data = data[data["CONF_RANK"] <= 10]
-    data = data[data["MP"] >= 24.0]
-    removed_players = data_copy.loc[~data_copy.index.isin(data.index)]
+    mask, drop_counts = data_preprocess.get_filters_mask(
+        data, conf.train.silver_filters, group_by="SEASON"
+    )
+    for description, count in drop_counts.items():
+        logger.debug(f"Filter {description}: {count} players removed")
     cols = ["SEASON", "G", "CONF_RANK", "MP"]
-    removed_mvp_candidates = removed_players[removed_players.MVP_CANDIDATE]
+    removed_mvp_candidates = data[~mask & data.MVP_CANDIDATE]
+    data = data[mask]
     logger.debug(f"{len(removed_mvp_candidates)} MVP candidates removed due to filters")
     if len(removed_mvp_candidates) > 0:
         print(removed_mvp_candidates.head()[cols])
     logger.debug(
         f"After filters: {len(data)} players - {len(data[data.MVP_CANDIDATE])} MVP candidates - {len(data[data.MVP_WINNER])} winners"
     )
-    data.to_csv(
-        conf.data.silver.path,
-        sep=conf.data.silver.sep,
-        encoding=conf.data.silver.encoding,
-        compression=conf.data.silver.compression,
-        index=True
-    )
+    return data
 
 
-def make_gold_data_and_train_model():
-    """Make gold training data from silver data"""
+def make_silver_data():
+    """Make silver training data from bronze data."""
+    storage.write(build_silver_data(load.load_bronze_data()), conf.data.silver)
+
+
+def make_gold_data_and_train_model(incremental_training=False, search_regressor=False):
+    """
+    Make gold training data from silver data, then evaluate and train the model.
+
+    With a regressor search, the regressor and its hyperparameters are selected by
+    successive halving on the training/validation seasons (see `search.search_regressor`).
+
+    With incremental training, the saved model is kept if its training data did not
+    change, and warm-started if only a few seasons changed (see `fit_final_model`).
+    The evaluation folds are always trained from scratch, since the saved model has
+    seen every held-out season.
+    """
     data = load.load_silver_data()
-    not_features = [
-        "PLAYER",
-        "MVP_VOTES_SHARE",
-        "MVP_WINNER",
-        "MVP_PODIUM",
-        "MVP_CANDIDATE",
-        "TEAM",
-        "SEASON",
-    ]
+    not_features = list(_NOT_FEATURES)
     features = [col for col in data.columns if col not in not_features]
     num_features = list(data_preprocess.get_numerical_columns(data[features]))
     cat_features = list(data_preprocess.get_categorical_columns(data[features]))
@@ -139,13 +141,12 @@ def make_gold_data_and_train_model():
     print("'" + "', '".join(selected_cat_features) + "'")
     print("'" + "', '".join(selected_num_features) + "'")
 
-    data_processed_features_only, data_raw = data_preprocess.scale_per_value_of(
-        data,
-        selected_cat_features,
+    pipeline = data_preprocess.PreprocessingPipeline(
         selected_num_features,
-        data["SEASON"],
+        selected_cat_features,
         min_max_scaler=min_max_scaling
     )
+    data_processed_features_only = pipeline.fit_transform(data)
     selected_cat_features_numerized = [
         f
         for f in data_processed_features_only.columns
@@ -157,13 +158,7 @@ def make_gold_data_and_train_model():
         [data_processed_features_only, data_not_features], axis=1
     )
 
-    data_processed.to_csv(
-        conf.data.gold.path,
-        sep=conf.data.gold.sep,
-        encoding=conf.data.gold.encoding,
-        compression=conf.data.gold.compression,
-        index=True
-    )
+    storage.write(data_processed, conf.data.gold)
 
     data = load.load_gold_data()
 
@@ -188,30 +183,21 @@ def make_gold_data_and_train_model():
         selected_num_features
     ]
 
-    method = "pearson"
-    top_corr_pearson = filter_by_correlation_with_target(
-        pandas.concat([data_for_corr_analysis, data_trainval[target]], axis=1),
-        target,
-        method=method,
-        n_features=n_features,
-        threshold=threshold
-    )
-    method = "kendall"
-    top_corr_kendall = filter_by_correlation_with_target(
+    methods = ["pearson", "kendall", "spearman"]
+    correlations_with_target = analyze.get_columns_correlations_with_target(
         pandas.concat([data_for_corr_analysis, data_trainval[target]], axis=1),
         target,
-        method=method,
-        n_features=n_features,
-        threshold=threshold
-    )
-    method = "spearman"
-    top_corr_spearman = filter_by_correlation_with_target(
-        pandas.concat([data_for_corr_analysis, data_trainval[target]], axis=1),
-        target,
-        method=method,
-        n_features=n_features,
-        threshold=threshold
+        methods=methods
     )
+    top_corr_pearson, top_corr_kendall, top_corr_spearman = [
+        filter_by_correlation_with_target(
+            correlations_with_target[method],
+            method=method,
+            n_features=n_features,
+            threshold=threshold
+        )
+        for method in methods
+    ]
 
     selected_features_pearson = top_corr_pearson.index.tolist()
     selected_features_kendall = top_corr_kendall.index.tolist()
@@ -222,7 +208,7 @@ def make_gold_data_and_train_model():
             + selected_features_kendall
             + selected_features_spearman
     )
-    selected_features = list(set(selected_features))
+    selected_features = list(dict.fromkeys(selected_features))
     logger.debug(f"Selected features : {len(selected_features)}")
 
     selected_features = [
@@ -240,8 +226,10 @@ def make_gold_data_and_train_model():
         "num": selected_num_features,
         "model": selected_features + selected_cat_features_numerized
     }
-    with open("data/features.json", "w") as outfile:
-        json.dump(features_dict, outfile, indent=2)
+    with open(conf.data.features.path, "w", encoding=conf.data.features.encoding) as outfile:
+        json.dump(features_dict, outfile, indent=conf.data.features.indent)
+    pipeline.set_model_features(features_dict["model"])
+    pipeline.save(conf.data.pipeline.path)
 
     regressor = neural_network.MLPRegressor(
         hidden_layer_sizes=9,
@@ -249,15 +237,40 @@ def make_gold_data_and_train_model():
         learning_rate_init=0.065,
         random_state=0
     )
+    trainval_cv = validation.SeasonCrossValidator(X_trainval, y_trainval, data_trainval.SEASON)
+    if search_regressor:
+        logger.debug("Searching regressor...")
+        regressor, _ = search.search_regressor(trainval_cv)
     regressors = [regressor]
 
+    season_hashes = util_functions.hash_seasons(pandas.concat([X_all, y_all, data_all.SEASON], axis=1))
+    previous_state = incremental.load_training_state() if incremental_training else {}
+    changed_seasons = incremental.get_changed_seasons(previous_state.get("seasons", {}), season_hashes)
+    warm_start = (
+        incremental_training
+        and hasattr(regressor, "partial_fit")
+        and os.path.exists(conf.data.model.path)
+        and previous_state.get("features") == features_dict["model"]
+        and previous_state.get("regressor") == repr(regressor)
+    )
+    if incremental_training and not previous_state:
+        logger.info("No training state of a saved model, training from scratch")
+    elif incremental_training and not warm_start:
+        logger.info("Saved model trained with other features or parameters, retraining from scratch")
+    elif warm_start and not changed_seasons:
+        logger.info("Training data unchanged since the saved model was trained, keeping it")
+        return
+    elif warm_start and len(changed_seasons) > conf.train.incremental.max_changed_seasons:
+        logger.info(f"{len(changed_seasons)} seasons changed since last training, retraining from scratch")
+        warm_start = False
+    elif warm_start:
+        logger.info(f"Seasons changed since last training : {changed_seasons}")
+
     splits = 3
     repeats = 2
-    splitter = model_selection.RepeatedKFold(
-        n_splits=splits, n_repeats=repeats, random_state=0
-    )
 
-    logger.debug("Fitting model...")
+    n_jobs = conf.train.n_jobs
+    logger.debug(f"Fitting model... ({n_jobs} jobs)")
 
     for step, regressor in enumerate(regressors):
         regressor_name = str(regressor.__class__.__name__)
@@ -281,17 +294,14 @@ def make_gold_data_and_train_model():
         val_MAPEs = []
         val_MAXs = []
 
-        for step, (train_index, val_index) in enumerate(
-                splitter.split(X_trainval, y_trainval)
+        folds = trainval_cv.k_folds(n_splits=splits, n_repeats=repeats, random_state=0)
+        fold_predictions = trainval_cv.run(regressor, folds, n_jobs=n_jobs)
+        for step, ((train_index, val_index), (y_pred, y_pred_train)) in enumerate(
+                zip(folds, fold_predictions)
         ):
             print(" Step", step + 1, "of", splits * repeats)
-            X_train = X_trainval.iloc[train_index, :]
-            X_val = X_trainval.iloc[val_index, :]
-            y_train = y_trainval.iloc[train_index]
-            y_val = y_trainval.iloc[val_index]
-            regressor.fit(X_train, y_train)
-            y_pred = regressor.predict(X_val)
-            y_pred_train = regressor.predict(X_train)
+            y_train = trainval_cv.y[train_index]
+            y_val = trainval_cv.y[val_index]
             train_MAEs.append(metrics.mean_absolute_error(y_train, y_pred_train))
             train_MSEs.append(metrics.mean_squared_error(y_train, y_pred_train))
             train_MAXs.append(metrics.max_error(y_train, y_pred_train))
@@ -311,20 +321,15 @@ def make_gold_data_and_train_model():
     logger.debug("Performing test seasons analysis...")
 
     logger.debug("Performing all season analysis...")
-    all_winners = pandas.DataFrame()
-    for season in data_all.SEASON.unique():
-        season_regressor = base.clone(regressor)
-        logger.debug(f"Season {season}")
-        data_all_train = data_all[data_all.SEASON != season]
-        data_all_test = data_all[data_all.SEASON == season]
-        X_all_train = data_all_train[
-            selected_features + selected_cat_features_numerized
-            ]
-        y_all_train = data_all_train[target]
-        X_all_test = data_all_test[selected_features + selected_cat_features_numerized]
-        y_all_test = data_all_test[target]
-        season_regressor.fit(X_all_train, y_all_train)
-        y_pred_all_test = season_regressor.predict(X_all_test)
+    all_cv = validation.SeasonCrossValidator(X_all, y_all, data_all.SEASON)
+    season_folds = all_cv.leave_one_season_out()
+    season_predictions = all_cv.run(regressor, season_folds, n_jobs=n_jobs, predict_train=False)
+    all_results = []
+    all_winners = []
+    for (_, test_index), (y_pred_all_test, _) in zip(season_folds, season_predictions):
+        data_all_test = data_all.iloc[test_index]
+        logger.debug(f"Season {data_all_test.SEASON.iloc[0]}")
+        y_all_test = y_all.iloc[test_index]
 
         results = y_all_test.rename("TRUTH").to_frame()
         results.loc[:, "PRED"] = y_pred_all_test
@@ -347,8 +352,11 @@ def make_gold_data_and_train_model():
         winners.loc[:, "REAL_RANK"] = winners["Pred. MVP"].map(ranks_reference)
         winners.loc[:, "PRED_RANK"] = winners["True MVP"].map(predicted_ranks_reference)
         winners = winners.sort_index(ascending=True)
-        all_winners = all_winners.append(winners)
+        all_results.append(results)
+        all_winners.append(winners)
 
+    results = pandas.concat(all_results)
+    all_winners = pandas.concat(all_winners)
     print(numpy.mean(results.AE))
     print(results.AE.max())
     print(numpy.mean(results.AE ** 2))
@@ -363,42 +371,102 @@ def make_gold_data_and_train_model():
     print((all_winners["REAL_RANK"]).mean())
     all_winners["Pred. MVP"] = all_winners["Pred. MVP"].map(data_all["PLAYER"])
     all_winners["True MVP"] = all_winners["True MVP"].map(data_all["PLAYER"])
-    all_winners.to_csv(
-        conf.data.performances.path,
-        sep=conf.data.performances.sep,
-        encoding=conf.data.performances.encoding,
-        compression=conf.data.performances.compression,
-        index=True
+    storage.write(all_winners, conf.data.performances)
+
+    final_regressor, fit_summary = fit_final_model(
+        regressor, X_all, y_all, previous_state if warm_start else None
+    )
+    joblib.dump(final_regressor, conf.data.model.path)
+    explain.save_background(
+        final_regressor, X_all, data_all.SEASON.astype(str) + "_" + data_all.MVP_CANDIDATE.astype(str)
     )
+    incremental.save_training_state({
+        "features": features_dict["model"],
+        "regressor": repr(regressor),
+        "seasons": {str(season): sha256 for season, sha256 in season_hashes.items()},
+        **fit_summary
+    })
+
+
+def fit_final_model(regressor, X, y, previous_state=None):
+    """
+    Fit the model used for predictions on all seasons.
+
+    When the state of the saved model is given, training continues from its weights
+    instead of a random initialization. It falls back to a full training if the
+    continuation does not converge, or ends with a loss too far above the loss of
+    the last full training.
+
+    Returns the fitted model and a summary of the fit, recorded in the training state.
+    """
+    if previous_state is not None:
+        start = time.perf_counter()
+        final_regressor = load.load_model()
+        converged, epochs = incremental.continue_training(
+            final_regressor, X, y, max_epochs=conf.train.incremental.max_epochs
+        )
+        fit_seconds = time.perf_counter() - start
+        max_loss = previous_state["full_fit_loss"] * (1 + conf.train.incremental.loss_tolerance)
+        if converged and final_regressor.loss_ <= max_loss:
+            logger.info(
+                f"Warm-started training : {epochs} epochs in {fit_seconds:.2f}s "
+                f"(last full training : {previous_state['full_fit_epochs']} epochs "
+                f"in {previous_state['full_fit_seconds']:.2f}s)"
+            )
+            return final_regressor, {
+                "mode": "warm-start",
+                "epochs": epochs,
+                "loss": float(final_regressor.loss_),
+                "fit_seconds": fit_seconds,
+                "full_fit_epochs": previous_state["full_fit_epochs"],
+                "full_fit_loss": previous_state["full_fit_loss"],
+                "full_fit_seconds": previous_state["full_fit_seconds"]
+            }
+        logger.warning(
+            f"Warm-started training did not converge (loss {final_regressor.loss_:.6f} "
+            f"after {epochs} epochs, maximum {max_loss:.6f}), retraining from scratch"
+        )
 
+    start = time.perf_counter()
     final_regressor = base.clone(regressor)
-    final_regressor.fit(X_all, y_all)
-    joblib.dump(final_regressor, conf.data.model.path)
+    final_regressor.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+    # Epochs and loss are only reported by iterative models (e.g. the MLP)
+    epochs = getattr(final_regressor, "n_iter_", None)
+    loss = getattr(final_regressor, "loss_", None)
+    epochs = int(epochs) if epochs is not None else None
+    loss = float(loss) if isinstance(loss, (int, float)) else None
+    logger.info(f"Full training : {epochs or '-'} epochs in {fit_seconds:.2f}s")
+    return final_regressor, {
+        "mode": "full",
+        "epochs": epochs,
+        "loss": loss,
+        "fit_seconds": fit_seconds,
+        "full_fit_epochs": epochs,
+        "full_fit_loss": loss,
+        "full_fit_seconds": fit_seconds
+    }
 
 
 def filter_by_correlation_with_target(
-        data, target, method="pearson", n_features=None, threshold=None
+        correlations, method="pearson", n_features=None, threshold=None
 ):
+    """Keep the features most correlated with the target, by count or by threshold."""
     print("Method :", method)
     if n_features is not None and threshold is None:
-        top_corr = analyze.get_columns_correlation_with_target(
-            data, target, method=method
-        )[:n_features]
+        top_corr = correlations[:n_features]
     elif n_features is None and threshold is not None:
-        top_corr = analyze.get_columns_correlation_with_target(
-            data, target, method=method
-        )
-        top_corr = top_corr[top_corr > threshold]
+        top_corr = correlations[correlations > threshold]
     else:
         raise Exception("Invalid arguments")
 
     return top_corr
 
 
-def train_model():
+def train_model(incremental_training=False, search_regressor=False):
     try:
         make_bronze_data()
         make_silver_data()
-        make_gold_data_and_train_model()
+        make_gold_data_and_train_model(incremental_training, search_regressor)
     except Exception as e:
         logger.error(f"Training model failed : {e}")
@@ -0,0 +1,125 @@
+from typing import List, Optional, Sequence, Tuple
+
+import joblib
+import numpy
+from sklearn import base
+
+
+def _fit_and_predict_fold(regressor, X, y, train_index, val_index, predict_train=True):
+    """Fit a regressor on the training rows of a fold and predict its validation rows."""
+    regressor.fit(X[train_index], y[train_index])
+    y_pred = regressor.predict(X[val_index])
+    y_pred_train = regressor.predict(X[train_index]) if predict_train else None
+    return y_pred, y_pred_train
+
+
+def run_folds(
+        regressor,
+        X,
+        y,
+        folds: Sequence[Tuple[numpy.ndarray, numpy.ndarray]],
+        n_jobs: Optional[int] = None,
+        predict_train: bool = True
+) -> List[Tuple[numpy.ndarray, Optional[numpy.ndarray]]]:
+    """
+    Fit a fresh clone of a regressor on each fold, on a pool of worker processes.
+
+    Args:
+        regressor: Unfitted regressor, cloned for every fold.
+        X: Features (DataFrame or array).
+        y: Target (Series or array).
+        folds: Positional (train, validation) row indices of each fold.
+        n_jobs: Number of worker processes (-1 for all cores, None or 1 for serial).
+        predict_train: Also predict the training rows of each fold.
+
+    Returns:
+        For each fold, in the order of `folds`: the predictions on the validation rows,
+        and on the training rows if `predict_train` is True (None otherwise).
+    """
+    X = numpy.asarray(X, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    return joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(_fit_and_predict_fold)(
+            base.clone(regressor), X, y, train_index, val_index, predict_train
+        )
+        for train_index, val_index in folds
+    )
+
+
+class SeasonCrossValidator:
+    """
+    Cross-validation engine holding out whole seasons, so that the players of a season
+    are never both in the training and validation rows of a fold.
+
+    Features and target are converted once to contiguous float arrays, and fold indices
+    are computed once per splitting scheme and cached: folds are cheap `numpy.take`s of
+    shared arrays rather than DataFrame copies. The same engine serves the evaluation,
+    the regressor search and the leave-one-season-out analysis.
+    """
+
+    def __init__(self, X, y, seasons):
+        """
+        Args:
+            X: Features (DataFrame or array).
+            y: Target (Series or array).
+            seasons: Season of each row.
+        """
+        self.X = numpy.ascontiguousarray(X, dtype=float)
+        self.y = numpy.ascontiguousarray(y, dtype=float)
+        self.seasons = numpy.asarray(seasons)
+        if not len(self.X) == len(self.y) == len(self.seasons):
+            raise ValueError("Features, target and seasons must have the same number of rows")
+        # Season of each row, as its position in the sorted unique seasons
+        self.unique_seasons, self._season_codes = numpy.unique(self.seasons, return_inverse=True)
+        self._folds_cache = {}
+
+    def _folds_of(self, season_groups: List[numpy.ndarray]) -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+        """Build positional folds, each validating on a group of season codes."""
+        folds = []
+        for season_group in season_groups:
+            is_val = numpy.isin(self._season_codes, season_group)
+            folds.append((numpy.flatnonzero(~is_val), numpy.flatnonzero(is_val)))
+        return folds
+
+    def k_folds(
+            self, n_splits: int, n_repeats: int = 1, random_state: int = 0
+    ) -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+        """
+        Randomly split the seasons in `n_splits` groups, each validated in turn, `n_repeats` times.
+
+        Returns:
+            Positional (train, validation) row indices of each fold, repeat after repeat.
+        """
+        key = ("k_folds", n_splits, n_repeats, random_state)
+        if key not in self._folds_cache:
+            if n_splits > len(self.unique_seasons):
+                raise ValueError(f"Cannot split {len(self.unique_seasons)} seasons in {n_splits} folds")
+            rng = numpy.random.default_rng(random_state)
+            season_groups = []
+            for _ in range(n_repeats):
+                season_groups.extend(numpy.array_split(rng.permutation(len(self.unique_seasons)), n_splits))
+            self._folds_cache[key] = self._folds_of(season_groups)
+        return self._folds_cache[key]
+
+    def leave_one_season_out(self) -> List[Tuple[numpy.ndarray, numpy.ndarray]]:
+        """
+        Hold out each season in turn.
+
+        Returns:
+            Positional (train, validation) row indices of each fold, in season order.
+        """
+        key = ("leave_one_season_out",)
+        if key not in self._folds_cache:
+            season_groups = [numpy.array([code]) for code in range(len(self.unique_seasons))]
+            self._folds_cache[key] = self._folds_of(season_groups)
+        return self._folds_cache[key]
+
+    def run(
+            self,
+            regressor,
+            folds: Sequence[Tuple[numpy.ndarray, numpy.ndarray]],
+            n_jobs: Optional[int] = None,
+            predict_train: bool = True
+    ) -> List[Tuple[numpy.ndarray, Optional[numpy.ndarray]]]:
+        """Fit a clone of a regressor on each fold (see `run_folds`)."""
+        return run_folds(regressor, self.X, self.y, folds, n_jobs=n_jobs, predict_train=predict_train)
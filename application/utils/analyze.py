@@ -1,5 +1,7 @@
 import numpy as np
+import pandas as pd
 import seaborn as sns
+from scipy import stats
 from matplotlib import pyplot as plt
 
 
@@ -7,22 +9,28 @@ def get_columns_with_inter_correlations_under(dataframe, threshold):
     """
     Remove columns that have correlation above a specified threshold.
 
+    The correlation matrix is computed once; after each dropped column, the pairs are
+    ranked again on the matrix masked to the remaining columns. Pairwise correlations
+    do not depend on the other columns, so this drops the same columns as recomputing
+    the correlations of the remaining data each time.
+
     :param dataframe: Input DataFrame
     :param threshold: Correlation threshold
     :return: Remaining columns after removal
     """
-    data_copy = dataframe.copy()
-    initial_num_cols = len(data_copy.columns)
+    initial_num_cols = len(dataframe.columns)
+    correlations = dataframe.corr().abs()
+    keep = np.ones(initial_num_cols, dtype=bool)
 
-    high_correlation_pairs = get_column_pairs_correlation_above_threshold(data_copy, threshold)
+    high_correlation_pairs = _sort_pairs_above_threshold(correlations, threshold)
 
-    while high_correlation_pairs:
-        col_to_drop = high_correlation_pairs[0][1]
-        print(f"Dropping {col_to_drop} which is correlated with {high_correlation_pairs[0][0]}")
-        data_copy.drop(col_to_drop, axis="columns", inplace=True)
-        high_correlation_pairs = get_column_pairs_correlation_above_threshold(data_copy, threshold)
+    while not high_correlation_pairs.empty:
+        col_kept, col_to_drop = high_correlation_pairs.index[0]
+        print(f"Dropping {col_to_drop} which is correlated with {col_kept}")
+        keep[correlations.columns.get_loc(col_to_drop)] = False
+        high_correlation_pairs = _sort_pairs_above_threshold(correlations.iloc[keep, keep], threshold)
 
-    remaining_cols = data_copy.columns
+    remaining_cols = dataframe.columns[keep]
     print(f"Reduced number of columns from {initial_num_cols} to {len(remaining_cols)}")
 
     return remaining_cols
@@ -36,11 +44,19 @@ def get_column_pairs_correlation_above_threshold(dataframe, threshold):
     :param threshold: Correlation threshold
     :return: Pairs of columns with high correlation
     """
-    correlations = dataframe.corr().abs()
-    sorted_correlations = correlations.unstack().sort_values(ascending=False)
-    filtered_correlations = sorted_correlations[(sorted_correlations < 1.0) & (sorted_correlations > threshold)]
+    return _sort_pairs_above_threshold(dataframe.corr().abs(), threshold).index.tolist()
 
-    return filtered_correlations.index.tolist()
+
+def _sort_pairs_above_threshold(correlations, threshold):
+    """
+    Sort the pairs of an absolute correlation matrix that are above a threshold.
+
+    :param correlations: Absolute correlation matrix
+    :param threshold: Correlation threshold
+    :return: Series of correlations indexed by column pairs, most correlated first
+    """
+    sorted_correlations = correlations.unstack().sort_values(ascending=False)
+    return sorted_correlations[(sorted_correlations < 1.0) & (sorted_correlations > threshold)]
 
 
 def get_columns_correlation_with_target(dataframe, target_column, method="pearson"):
@@ -52,8 +68,86 @@ def get_columns_correlation_with_target(dataframe, target_column, method="pearso
     :param method: Correlation method (default is "pearson")
     :return: Sorted series of column correlations with the target column
     """
-    correlations_with_target = dataframe.corr(method=method)[target_column]
-    return correlations_with_target[correlations_with_target < 1.0].abs().sort_values(ascending=False)
+    return get_columns_correlations_with_target(dataframe, target_column, methods=[method])[method]
+
+
+def get_columns_correlations_with_target(dataframe, target_column, methods=("pearson", "kendall", "spearman")):
+    """
+    Get column correlations with a specified target column, for several methods at once.
+
+    Only the correlations with the target are computed, not the full correlation matrix.
+    Columns are ranked once and the ranks are reused for Spearman, and Kendall tau-b is
+    computed with the O(n log n) algorithm of scipy. Like DataFrame.corr, missing
+    values are handled pairwise.
+
+    :param dataframe: Input DataFrame (numerical columns only)
+    :param target_column: Target column
+    :param methods: Correlation methods among "pearson", "kendall" and "spearman"
+    :return: Dict mapping each method to the sorted series of absolute correlations with the target
+    """
+    unknown_methods = set(methods) - {"pearson", "kendall", "spearman"}
+    if unknown_methods:
+        raise ValueError(f"Unknown correlation methods: {', '.join(sorted(unknown_methods))}")
+
+    values = dataframe.to_numpy(dtype=float)
+    target = dataframe[target_column].to_numpy(dtype=float)
+    complete = ~np.isnan(values) & ~np.isnan(target)[:, None]
+    fully_complete = complete.all(axis=0)
+
+    correlations = {}
+    if "pearson" in methods:
+        correlations["pearson"] = _pearson_with_target(values, target, complete, fully_complete)
+    if "spearman" in methods:
+        ranks = dataframe.rank(method="average").to_numpy(dtype=float)
+        target_ranks = dataframe[target_column].rank(method="average").to_numpy(dtype=float)
+        spearman = _pearson_with_target(ranks, target_ranks, complete, fully_complete)
+        for col in np.flatnonzero(~fully_complete):
+            # Ranks must be computed on the rows where both values are available
+            mask = complete[:, col]
+            spearman[col] = _pearson(
+                stats.rankdata(values[mask, col]), stats.rankdata(target[mask])
+            )
+        correlations["spearman"] = spearman
+    if "kendall" in methods:
+        kendall = np.full(values.shape[1], np.nan)
+        for col in range(values.shape[1]):
+            mask = complete[:, col]
+            if mask.sum() > 1:
+                kendall[col] = stats.kendalltau(values[mask, col], target[mask])[0]
+        correlations["kendall"] = kendall
+
+    results = {}
+    for method in methods:
+        correlations_with_target = pd.Series(correlations[method], index=dataframe.columns).drop(target_column)
+        results[method] = (
+            correlations_with_target[correlations_with_target < 1.0].abs().sort_values(ascending=False)
+        )
+    return results
+
+
+def _pearson_with_target(values, target, complete, fully_complete):
+    """Pearson correlation of each column with the target, vectorized over complete columns."""
+    correlations = np.full(values.shape[1], np.nan)
+    if fully_complete.any():
+        centered = values[:, fully_complete] - values[:, fully_complete].mean(axis=0)
+        centered_target = target - target.mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlations[fully_complete] = (centered_target @ centered) / np.sqrt(
+                (centered ** 2).sum(axis=0) * (centered_target ** 2).sum()
+            )
+    for col in np.flatnonzero(~fully_complete):
+        mask = complete[:, col]
+        correlations[col] = _pearson(values[mask, col], target[mask])
+    return correlations
+
+
+def _pearson(x, y):
+    """Pearson correlation of two arrays (NaN if undefined)."""
+    if len(x) < 2:
+        return np.nan
+    x_centered, y_centered = x - x.mean(), y - y.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (x_centered @ y_centered) / np.sqrt((x_centered ** 2).sum() * (y_centered ** 2).sum())
 
 
 def pairplot_columns(dataframe, columns, color_by):
@@ -0,0 +1,192 @@
+import operator
+from typing import Any, List, Optional, Tuple, Union
+
+import pandas as pd
+
+CSV_FORMAT = "csv"
+PARQUET_FORMAT = "parquet"
+SUPPORTED_FORMATS = (CSV_FORMAT, PARQUET_FORMAT)
+# Operators of row filters, shared with the silver filters of data_preprocess
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values)
+}
+
+
+def get_format(data_conf) -> str:
+    """
+    Get the storage format of a dataset.
+
+    Args:
+        data_conf: Configuration of the dataset (from the `data` section of conf.yaml).
+
+    Returns:
+        str: Storage format, CSV if not specified.
+    """
+    storage_format = data_conf.format or CSV_FORMAT
+    if storage_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported storage format {storage_format} for {data_conf.path}")
+    return storage_format
+
+
+def read(
+        data_conf,
+        nrows: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        index_col: Union[int, bool] = 0,
+        filters: Optional[List[Tuple[str, str, Any]]] = None
+) -> pd.DataFrame:
+    """
+    Read a dataset with the backend selected in its configuration.
+
+    Args:
+        data_conf: Configuration of the dataset.
+        nrows: Number of rows to read (all rows if None).
+        columns: Columns to read, besides the index (all columns if None).
+        index_col: Position of the index column for CSV files, False for no index.
+        filters: Row filters (column, operator, value), all of which must be met,
+            e.g. [("SEASON", "==", 2024)]. Parquet files skip the other rows while
+            reading; CSV files are filtered once read.
+
+    Returns:
+        The dataset, with the column types declared in its schema.
+    """
+    if get_format(data_conf) == PARQUET_FORMAT:
+        data = pd.read_parquet(data_conf.path, columns=columns, filters=filters or None)
+        if nrows is not None:
+            data = data.head(nrows)
+    else:
+        usecols = None
+        if columns is not None:
+            header = pd.read_csv(
+                data_conf.path,
+                sep=data_conf.sep,
+                encoding=data_conf.encoding,
+                compression=data_conf.compression,
+                nrows=0
+            ).columns.tolist()
+            usecols = list(columns)
+            if index_col is not False:
+                usecols = [header[index_col]] + usecols
+        schema = data_conf.schema or {}
+        data = pd.read_csv(
+            data_conf.path,
+            sep=data_conf.sep,
+            encoding=data_conf.encoding,
+            compression=data_conf.compression,
+            index_col=index_col,
+            usecols=usecols,
+            nrows=nrows,
+            dtype={col: dtype for col, dtype in schema.items() if dtype not in ("str", "bool")}
+        )
+        if filters:
+            data = filter_rows(data, filters)
+    return apply_schema(data, data_conf.schema)
+
+
+def filter_rows(data: pd.DataFrame, filters: List[Tuple[str, str, Any]]) -> pd.DataFrame:
+    """
+    Keep the rows meeting all the given filters.
+
+    Args:
+        data: Dataset to filter.
+        filters: Row filters (column, operator, value), see FILTER_OPERATORS.
+
+    Returns:
+        The filtered dataset.
+    """
+    mask = pd.Series(True, index=data.index)
+    for column, op, value in filters:
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator {op}")
+        mask &= FILTER_OPERATORS[op](data[column], value)
+    return data[mask]
+
+
+def write(data: pd.DataFrame, data_conf, index: bool = True) -> None:
+    """
+    Write a dataset with the backend selected in its configuration.
+
+    Args:
+        data: Dataset to write.
+        data_conf: Configuration of the dataset.
+        index: Whether to write the index.
+    """
+    data = apply_schema(data, data_conf.schema)
+    if get_format(data_conf) == PARQUET_FORMAT:
+        data = _infer_object_columns(data, data_conf.schema)
+        data.to_parquet(
+            data_conf.path,
+            engine="pyarrow",
+            compression=data_conf.compression or "zstd",
+            index=index
+        )
+    else:
+        data.to_csv(
+            data_conf.path,
+            sep=data_conf.sep,
+            encoding=data_conf.encoding,
+            compression=data_conf.compression,
+            index=index
+        )
+
+
+def apply_schema(data: pd.DataFrame, schema: Optional[dict]) -> pd.DataFrame:
+    """
+    Cast the columns declared in a dataset schema to their type.
+
+    Columns missing from the data are ignored, as are undeclared columns.
+    Missing values of string columns are kept as missing values.
+
+    Args:
+        data: Dataset to cast.
+        schema: Mapping of column names to dtypes ("str", "bool", "int64", "float64"...).
+
+    Returns:
+        The dataset with typed columns.
+    """
+    if not schema:
+        return data
+    casts = {}
+    for col, dtype in schema.items():
+        if col not in data.columns or str(data[col].dtype) == dtype:
+            continue
+        if dtype == "str":
+            if pd.api.types.is_string_dtype(data[col]):
+                continue
+            casts[col] = data[col].astype(str).where(data[col].notna())
+        elif dtype == "bool" and not pd.api.types.is_bool_dtype(data[col]):
+            casts[col] = data[col].map({"True": True, "False": False, True: True, False: False})
+            casts[col] = casts[col].fillna(False).astype(bool)
+        else:
+            casts[col] = data[col].astype(dtype)
+    if casts:
+        data = data.assign(**casts)
+    return data
+
+
+def _infer_object_columns(data: pd.DataFrame, schema: Optional[dict]) -> pd.DataFrame:
+    """
+    Give undeclared object columns the type a CSV round trip would have inferred.
+
+    Scraped tables often hold numbers as strings; columnar files keep the type
+    they are written with, so such columns are converted to numbers when possible
+    and to strings otherwise.
+    """
+    schema = schema or {}
+    casts = {}
+    for col in data.select_dtypes(include=["object", "string"]).columns:
+        if col in schema:
+            continue
+        try:
+            casts[col] = pd.to_numeric(data[col])
+        except (TypeError, ValueError):
+            casts[col] = data[col].astype(str).where(data[col].notna())
+    if casts:
+        data = data.assign(**casts)
+    return data
@@ -1,3 +1,8 @@
+from datetime import datetime
+import hashlib
+from typing import Dict
+
+import pandas
 import yaml
 from box import Box
 
@@ -17,3 +22,31 @@ def get_dict_from_yaml(yaml_path: str) -> Box:
         conf_dict = yaml.safe_load(f)
 
     return Box(conf_dict, default_box=True, default_box_attr=None)
+
+
+def get_current_season() -> int:
+    """
+    Return the current NBA season, identified by the year it ends.
+
+    Returns:
+        int: The current season (seasons start after September).
+    """
+    now = datetime.now()
+    return now.year + 1 if now.month > 9 else now.year
+
+
+def hash_seasons(data: pandas.DataFrame) -> Dict[int, str]:
+    """
+    Compute a content hash of the rows of each season.
+
+    Args:
+        data (pandas.DataFrame): Data with a SEASON column.
+
+    Returns:
+        Dict[int, str]: SHA-256 of the rows (index included) of each season.
+    """
+    hashes = {}
+    for season, season_data in data.groupby("SEASON", sort=True):
+        row_hashes = pandas.util.hash_pandas_object(season_data.sort_index(), index=True)
+        hashes[int(season)] = hashlib.sha256(row_hashes.values.tobytes()).hexdigest()
+    return hashes
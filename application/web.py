@@ -1,27 +1,40 @@
 from datetime import datetime
 import os
 import re
+import threading
+import time
 import streamlit as st
 import pandas
 import numpy
 from application import conf, sidebar, logger
-from application import data_downloader, artifacts
-from application.model import evaluate
+from application import artifact_cache
+from application.model import evaluate, shap_history
 
 # Constants
 PAGE_PREDICTIONS = "Current year predictions"
 PAGE_EXPLANATIONS = "Explanation of predictions"
 PAGE_PERFORMANCE = "Model performance analysis"
+PAGE_EXPLANATIONS_HISTORY = "Evolution of explanations"
 CONFIDENCE_MODE_SOFTMAX = "Softmax-based"
 CONFIDENCE_MODE_SHARE = "Share-based"
+CONFIDENCE_MODE_SIMULATION = "Simulation-based"
+# Number of stats with the strongest positive and negative impact shown per player
+EXPLANATION_TOP_K = 3
+HISTORY_CHANCE_COLUMNS = {
+    CONFIDENCE_MODE_SOFTMAX: "chance_softmax",
+    CONFIDENCE_MODE_SHARE: "chance_share",
+}
+# Ranked history frames, shared by all sessions
+RANKED_HISTORY_CACHE_SIZE = 16
+_ranked_history_cache = {}
+_ranked_history_lock = threading.Lock()
 
 pandas.set_option("display.precision", 2)
 
 
-def build_predictions():
-    download_predictions()
+def read_predictions(path):
     predictions = pandas.read_csv(
-        "./data/predictions-artifact.csv.zip",
+        path,
         sep=conf.data.predictions.sep,
         encoding=conf.data.predictions.encoding,
         compression="zip",
@@ -32,6 +45,29 @@ def build_predictions():
     return predictions
 
 
+def build_predictions():
+    return artifact_cache.get_artifact_cache().get("predictions-2024.csv", read_predictions).copy()
+
+
+def read_simulations(path):
+    simulations = pandas.read_csv(
+        path,
+        sep=conf.data.simulations.sep,
+        encoding=conf.data.simulations.encoding,
+        compression="zip",
+        index_col=0,
+        dtype={}
+    )
+    simulations = simulations.set_index("PLAYER", drop=True)
+    # Rows are sorted by MVP probability, keep the best row of traded players
+    simulations = simulations[~simulations.index.duplicated()]
+    return simulations
+
+
+def build_simulations():
+    return artifact_cache.get_artifact_cache().get("simulations-2024.csv", read_simulations).copy()
+
+
 def mvp_found_pct(performances):
     metrics = (performances["Predicted MVP"] == performances["True MVP"]).sum() / len(
         performances
@@ -50,10 +86,9 @@ def avg_pred_mvp_rank(performances):
     return "%.1f" % metrics
 
 
-def build_performances():
-    download_performances()
+def read_performances(path):
     performances = pandas.read_csv(
-        "./data/performances-artifact.csv.zip",
+        path,
         sep=conf.data.performances.sep,
         encoding=conf.data.performances.encoding,
         compression="zip",
@@ -91,30 +126,71 @@ def build_performances():
     return performances
 
 
-@st.cache(ttl=3600)  # 1h cache
-def download_performances():
-    date, url = artifacts.get_last_artifact("performances.csv")
-    logger.debug(f"Downloading performances from {url}")
-    data_downloader.download_data_from_url_to_file(
-        url, "./data/performances-artifact.csv.zip", auth=artifacts.get_github_auth()
-    )
+def build_performances():
+    return artifact_cache.get_artifact_cache().get("performances.csv", read_performances).copy()
 
 
-@st.cache(ttl=3600)  # 1h cache
-def download_predictions():
-    date, url = artifacts.get_last_artifact("predictions-2024.csv")
-    logger.debug(f"Downloading history from {url}")
-    data_downloader.download_data_from_url_to_file(
-        url, "./data/predictions-artifact.csv.zip", auth=artifacts.get_github_auth()
+def summarize_shap_values(shap_values, top_k=EXPLANATION_TOP_K):
+    """
+    Precompute what the explanations page shows from SHAP values.
+
+    Binary features are removed (SHAP values should not be trusted for them) and the
+    "_advanced" suffix of the others is dropped. For each player, the top-k features
+    with the strongest positive and negative impact are selected with argpartition.
+    The mean and mean absolute impact of each feature are computed once.
+
+    Returns:
+        dict: "drivers" (player -> positive and negative (feature, impact) lists, strongest
+        first) and "importance" (mean and mean absolute impact of each feature).
+    """
+    shap_values = shap_values[
+        shap_values.columns[
+            ~shap_values.columns.str.contains("ERN_CONF") & ~shap_values.columns.str.contains("POS_")
+        ]
+    ]
+    shap_values = shap_values[~shap_values.index.duplicated()]
+    features = [remove_trailing_sequence(f, "_advanced") for f in shap_values.columns]
+    values = shap_values.to_numpy(dtype=float)
+    top_k = min(top_k, values.shape[1])
+
+    drivers = {}
+    if top_k > 0 and len(values) > 0:
+        rows = numpy.arange(len(values))[:, None]
+        # Strongest positive then negative impacts of each player, unsorted, then sorted
+        positive = numpy.argpartition(-values, top_k - 1, axis=1)[:, :top_k]
+        positive = positive[rows, numpy.argsort(-values[rows, positive], axis=1)]
+        negative = numpy.argpartition(values, top_k - 1, axis=1)[:, :top_k]
+        negative = negative[rows, numpy.argsort(values[rows, negative], axis=1)]
+        for position, player in enumerate(shap_values.index):
+            drivers[player] = {
+                "positive": [
+                    (features[f], float(values[position, f])) for f in positive[position] if values[position, f] > 0.0
+                ],
+                "negative": [
+                    (features[f], float(values[position, f])) for f in negative[position] if values[position, f] < 0.0
+                ],
+            }
+
+    importance = pandas.DataFrame(
+        {
+            "col_name": features,
+            "feature_importance_vals": values.mean(axis=0) if len(values) else 0.0,
+            "abs_feature_importance_vals": numpy.abs(values).mean(axis=0) if len(values) else 0.0,
+        }
     )
+    return {"drivers": drivers, "importance": importance}
+
 
-@st.cache(ttl=3600)  # 1h cache
-def download_shap_values():
-    date, url = artifacts.get_last_artifact("shap_values-2024.csv")
-    logger.debug(f"Downloading shap values from {url}")
-    data_downloader.download_data_from_url_to_file(
-        url, "./data/shap_values-2024.csv.zip", auth=artifacts.get_github_auth()
+def read_shap_values(path):
+    shap_values = pandas.read_csv(
+        path,
+        sep=conf.data.shap_values.sep,
+        encoding=conf.data.shap_values.encoding,
+        compression="zip",
+        index_col=0,
+        dtype={},
     )
+    return summarize_shap_values(shap_values)
 
 
 def build_shap_values():
@@ -128,31 +204,18 @@ def build_shap_values():
             index_col=0,
             dtype={},
         )
-    else:
-        download_shap_values()
-        shap_values = pandas.read_csv(
-            "./data/shap_values-2024.csv.zip",
-            sep=conf.data.shap_values.sep,
-            encoding=conf.data.shap_values.encoding,
-            compression="zip",
-            index_col=0,
-            dtype={},
-        )
-    return shap_values
+        return summarize_shap_values(shap_values)
+    # Summaries are built once per SHAP values artifact, and shared by all sessions
+    return artifact_cache.get_artifact_cache().get("shap_values-2024.csv", read_shap_values)
 
-@st.cache(ttl=3600)  # 1h cache
-def download_history():
-    date, url = artifacts.get_last_artifact("history-2024.csv")
-    logger.debug(f"Downloading history from {url}")
-    data_downloader.download_data_from_url_to_file(
-        url, "./data/history-artifact.csv.zip", auth=artifacts.get_github_auth()
-    )
 
+def build_shap_history():
+    return artifact_cache.get_artifact_cache().get("shap_history", shap_history.ShapHistory)
 
-def build_history():
-    download_history()
+
+def read_history(path):
     history = pandas.read_csv(
-        "./data/history-artifact.csv.zip",
+        path,
         sep=conf.data.history.sep,
         encoding=conf.data.history.encoding,
         compression="zip",
@@ -163,34 +226,71 @@ def build_history():
         columns={"DATE": "date", "PLAYER": "player", "PRED": "prediction"}
     )
     history.date = pandas.to_datetime(history.date, format="%d-%m-%Y")
+    return history
+
+
+def build_history():
+    history = artifact_cache.get_artifact_cache().get("history-2024.csv", read_history).copy()
     today_date = pandas.Timestamp(datetime.today().date())
     history["days_ago"] = (today_date - history.date).dt.days.astype(int)
     return history
 
 
+def get_history_version(history):
+    """Identify the content of a history frame, to reuse computations made on it."""
+    return int(pandas.util.hash_pandas_object(history, index=False).sum())
+
+
+def rank_history(history, history_version, compute_probs_based_on_top_n):
+    """
+    Rank players of each date of the history and compute their MVP chance for every confidence mode.
+
+    Chances are computed among the top players of each date, in one grouped pass over
+    all dates, and memoized by history version and number of players.
+
+    Returns:
+        The history, with the rank of each prediction in its date and a chance column
+        (in %) per confidence mode.
+    """
+    key = (history_version, compute_probs_based_on_top_n)
+    with _ranked_history_lock:
+        ranked = _ranked_history_cache.get(key)
+    if ranked is not None:
+        return ranked
+    ranked = history.copy()
+    ranked["rank"] = ranked.groupby("date", sort=False)["prediction"].rank(ascending=False)
+    top_predictions = ranked["prediction"].where(ranked["rank"] <= compute_probs_based_on_top_n)
+    ranked[HISTORY_CHANCE_COLUMNS[CONFIDENCE_MODE_SOFTMAX]] = (
+            evaluate.grouped_softmax(top_predictions, ranked["date"]) * 100
+    )
+    ranked[HISTORY_CHANCE_COLUMNS[CONFIDENCE_MODE_SHARE]] = (
+            evaluate.grouped_share(top_predictions, ranked["date"]) * 100
+    )
+    with _ranked_history_lock:
+        if len(_ranked_history_cache) >= RANKED_HISTORY_CACHE_SIZE:
+            _ranked_history_cache.pop(next(iter(_ranked_history_cache)))
+        _ranked_history_cache[key] = ranked
+    return ranked
+
+
 def prepare_history(
         stats,
         keep_top_n,
         confidence_mode,
         compute_probs_based_on_top_n,
         keep_last_days=None,
+        history_version=None,
 ):
-    keep_players = stats.sort_values(by=["date", "prediction"], ascending=False)[
+    if history_version is None:
+        history_version = get_history_version(stats)
+    ranked = rank_history(stats, history_version, compute_probs_based_on_top_n)
+    keep_players = ranked.sort_values(by=["date", "prediction"], ascending=False)[
                        "player"
                    ].to_list()[:keep_top_n]
-    for date in stats.date.unique():
-        stats.loc[stats.date == date, "rank"] = stats.loc[
-            stats.date == date, "prediction"
-        ].rank(ascending=False)
-        if confidence_mode == CONFIDENCE_MODE_SOFTMAX:
-            stats.loc[stats.date == date, "chance"] = (
-                    evaluate.softmax(stats[stats.date == date]["prediction"]) * 100
-            )
-        else:
-            stats.loc[stats.date == date, "chance"] = (
-                    evaluate.share(stats[stats.date == date]["prediction"]) * 100
-            )
-    stats = stats[stats["player"].isin(keep_players)]
+    # History only holds predictions, simulations are not available for past days
+    chance_column = HISTORY_CHANCE_COLUMNS.get(confidence_mode, HISTORY_CHANCE_COLUMNS[CONFIDENCE_MODE_SHARE])
+    stats = ranked[ranked["player"].isin(keep_players)]
+    stats = stats.drop(columns=list(HISTORY_CHANCE_COLUMNS.values())).assign(chance=stats[chance_column])
     stats = stats.fillna(0.0)
     if keep_last_days is not None:
         stats = stats[stats.days_ago <= keep_last_days]
@@ -208,680 +308,585 @@ def remove_trailing_sequence(string, sequence):
         return string
 
 
-def run():
-    st.set_page_config(
-        page_title="NBA season MVP predictor",
-        page_icon=":basketball:",
-        layout="wide",
-        initial_sidebar_state="auto"
-    )
-    st.title("NBA season MVP Predict🏀r")
-    local_css("application/css/custom.css")
-    try:
-        predictions = build_predictions()
-        building_predictions_succeeded = True
-    except (OSError, Exception) as e:
-        logger.error(f"Failed to build predictions {e}", exc_info=False)
-        predictions = pandas.DataFrame(
-            columns=[
-                "PLAYER",
-                "POS",
-                "AGE",
-                "TEAM",
-                "G",
-                "GS",
-                "MP",
-                "FG_per_game",
-                "FGA_per_game",
-                "FG%",
-                "3P_per_game",
-                "3PA_per_game",
-                "3P%",
-                "2P_per_game",
-                "2PA_per_game",
-                "2P%",
-                "EFG%_per_game",
-                "FT_per_game",
-                "FTA_per_game",
-                "FT%",
-                "ORB_per_game",
-                "DRB_per_game",
-                "TRB_per_game",
-                "AST_per_game",
-                "STL_per_game",
-                "BLK_per_game",
-                "TOV_per_game",
-                "PF_per_game",
-                "PTS_per_game",
-                "SEASON",
-                "FG_per_36min",
-                "FGA_per_36min",
-                "3P_per_36min",
-                "3PA_per_36min",
-                "2P_per_36min",
-                "2PA_per_36min",
-                "FT_per_36min",
-                "FTA_per_36min",
-                "ORB_per_36min",
-                "DRB_per_36min",
-                "TRB_per_36min",
-                "AST_per_36min",
-                "STL_per_36min",
-                "BLK_per_36min",
-                "TOV_per_36min",
-                "PF_per_36min",
-                "PTS_per_36min",
-                "FG_per_100poss",
-                "FGA_per_100poss",
-                "3P_per_100poss",
-                "3PA_per_100poss",
-                "2P_per_100poss",
-                "2PA_per_100poss",
-                "FT_per_100poss",
-                "FTA_per_100poss",
-                "ORB_per_100poss",
-                "DRB_per_100poss",
-                "TRB_per_100poss",
-                "AST_per_100poss",
-                "STL_per_100poss",
-                "BLK_per_100poss",
-                "TOV_per_100poss",
-                "PF_per_100poss",
-                "PTS_per_100poss",
-                "ORTG_per_100poss",
-                "DRTG_per_100poss",
-                "PER_advanced",
-                "TS%_advanced",
-                "3PAR_advanced",
-                "FTR_advanced",
-                "ORB%_advanced",
-                "DRB%_advanced",
-                "TRB%_advanced",
-                "AST%_advanced",
-                "STL%_advanced",
-                "BLK%_advanced",
-                "TOV%_advanced",
-                "USG%_advanced",
-                "OWS_advanced",
-                "DWS_advanced",
-                "WS_advanced",
-                "WS/48_advanced",
-                "OBPM_advanced",
-                "DBPM_advanced",
-                "BPM_advanced",
-                "VORP_advanced",
-                "MVP_VOTES_SHARE",
-                "MVP_WINNER",
-                "MVP_PODIUM",
-                "MVP_CANDIDATE",
-                "W",
-                "L",
-                "W/L%",
-                "GB",
-                "PW",
-                "PL",
-                "PS/G",
-                "PA/G",
-                "CONF",
-                "CONF_RANK",
-                "PRED",
-                "PRED_RANK",
-            ]
-        )
-        building_predictions_succeeded = False
-    try:
-        history = build_history()
-        last_update = str(history.date.max().date())
-        building_history_succeeded = True
-    except (OSError, Exception) as e:
-        logger.error(f"Failed to build history {e}", exc_info=False)
-        history = pandas.DataFrame(columns=["DATE", "PLAYER", "PRED"])
-        last_update = "N/A"
-        building_history_succeeded = False
+# Artifacts shown by the pages, prefetched in the background when the app starts
+ARTIFACT_PARSERS = {
+    "predictions-2024.csv": read_predictions,
+    "simulations-2024.csv": read_simulations,
+    "history-2024.csv": read_history,
+    "performances.csv": read_performances,
+    "shap_values-2024.csv": read_shap_values,
+    "shap_history": shap_history.ShapHistory,
+}
+
+
+def load_page_data(build, description):
+    """Build data shown by a page, or return None if it is not available."""
     try:
-        performances = build_performances()
-        building_performances_succeeded = True
+        return build()
     except (OSError, Exception) as e:
-        logger.error(f"Failed to build performances {e}", exc_info=False)
-        performances = pandas.DataFrame(
-            columns=[
-                "DATE",
-                "SEASON",
-                "TRUTH",
-                "PRED",
-                "AE",
-                "Pred. MVP",
-                "True MVP",
-                "REAL_RANK",
-                "PRED_RANK",
-                "Real MVP rank" "PLAYER",
-                "PRED",
-            ]
-        )
-        building_performances_succeeded = False
+        logger.error(f"Failed to build {description} {e}", exc_info=False)
+        return None
+
+
+def get_last_update():
+    """Return the creation date of the last predictions, from the artifact listing (without downloading them)."""
     try:
-        shap_values = build_shap_values()
-        building_shap_values_succeeded = True
+        cache = artifact_cache.get_artifact_cache()
+        cache.refresh()
+        last_predictions = cache.index.get_latest("predictions-2024.csv")
     except (OSError, Exception) as e:
-        logger.error(f"Failed to build shap values {e}", exc_info=False)
-        shap_values = pandas.DataFrame(
-            columns=[
-                "player",
-                "2P_per_game",
-                "FGA_per_100poss",
-                "TRB_per_game",
-                "FTA_per_game",
-                "FG_per_36min",
-                "PS/G",
-                "AST_per_36min",
-                "FG_per_100poss",
-                "PER_advanced",
-                "PA/G",
-                "FT_per_36min",
-                "PTS_per_36min",
-                "AST%_advanced",
-                "EFG%_per_game",
-                "2P%",
-                "AST_per_game",
-                "MP",
-                "ORB_per_36min",
-                "PL",
-                "DRTG_per_100poss",
-                "DRB_per_game",
-                "WS/48_advanced",
-                "DBPM_advanced",
-                "BLK_per_100poss",
-                "2P_per_100poss",
-                "CONF_RANK",
-                "FG_per_game",
-                "FG%",
-                "FTR_advanced",
-                "ORB_per_game",
-                "2PA_per_game",
-                "2PA_per_36min",
-                "PW",
-                "GB",
-                "OWS_advanced",
-                "FGA_per_game",
-                "BLK_per_game",
-                "STL_per_game",
-                "FTA_per_36min",
-                "G",
-                "BPM_advanced",
-                "VORP_advanced",
-                "OBPM_advanced",
-                "W",
-                "W/L%",
-                "WS_advanced",
-                "PF_per_36min",
-                "PF_per_100poss",
-                "FT_per_game",
-                "FT%",
-                "PTS_per_game",
-                "L",
-                "TRB_per_100poss",
-                "TS%_advanced",
-                "STL_per_100poss",
-                "DWS_advanced",
-                "FGA_per_36min",
-                "PTS_per_100poss",
-                "DRB_per_36min",
-                "POS_C",
-                "POS_PF",
-                "POS_PG",
-                "POS_SF",
-                "POS_SG",
-                "CONF_EASTERN_CONF",
-                "CONF_WESTERN_CONF",
-            ]
-        )
-        building_shap_values_succeeded = False
-    current_season = (
-        datetime.now().year + 1 if datetime.now().month > 9 else datetime.now().year
-    )
-    st.markdown(
-        f"""
-    *Predicting the NBA Most Valuable Player for the {current_season - 1}-{str(current_season)[-2:]} season using machine learning.*
-    *Last update : {last_update}.*
-    """
-    )
-
-    st.sidebar.image("application/utils/nba-logo.png", use_column_width=True)
+        logger.error(f"Failed to list artifacts {e}", exc_info=False)
+        return "N/A"
+    return str(last_predictions["created_at"].date()) if last_predictions is not None else "N/A"
+
+
+def show_predictions_page():
+    predictions = load_page_data(build_predictions, "predictions")
+    simulations = load_page_data(build_simulations, "simulations")
+    history = load_page_data(build_history, "history")
+    # Also used by the history section when predictions are not available
+    confidence_mode = CONFIDENCE_MODE_SHARE
+    compute_probs_based_on_top_n = 10
+
+    if predictions is not None:
+
+        initial_columns = list(predictions.columns)
+
+        col1, col2 = st.columns(2)
+        col1.subheader("Predicted top 3")
+        col2.subheader("Prediction parameters")
+        confidence_modes = [CONFIDENCE_MODE_SHARE, CONFIDENCE_MODE_SOFTMAX]
+        if simulations is not None:
+            confidence_modes = [CONFIDENCE_MODE_SIMULATION] + confidence_modes
+        confidence_mode = col2.radio(
+            "Method used to estimate MVP probability",
+            confidence_modes,
+        )
+        compute_probs_based_on_top_n = col2.slider(
+            "Number of players used to estimate probability",
+            min_value=3,
+            max_value=10,
+            value=10,
+            step=1,
+            format="%d players",
+        )
+        if confidence_mode == CONFIDENCE_MODE_SOFTMAX:
+            predictions.loc[
+                predictions.PRED_RANK <= compute_probs_based_on_top_n,
+                "MVP probability",
+            ] = (
+                    evaluate.softmax(
+                        predictions[
+                            predictions.PRED_RANK <= compute_probs_based_on_top_n
+                            ]["PRED"]
+                    )
+                    * 100
+            )
+        else:
+            predictions.loc[
+                predictions.PRED_RANK <= compute_probs_based_on_top_n,
+                "MVP probability",
+            ] = (
+                    evaluate.share(
+                        predictions[
+                            predictions.PRED_RANK <= compute_probs_based_on_top_n
+                            ]["PRED"]
+                    )
+                    * 100
+            )
+        predictions.loc[
+            predictions.PRED_RANK > compute_probs_based_on_top_n, "MVP probability"
+        ] = 0.0
+        if confidence_mode == CONFIDENCE_MODE_SIMULATION:
+            # Frequency of finishing first among simulations of the rest of the season
+            predictions["MVP probability"] = (
+                    simulations["MVP_PROBABILITY"].reindex(predictions.index).fillna(0.0) * 100
+            )
+        predictions["MVP probability"] = predictions["MVP probability"].map(
+            "{:,.2f}%".format
+        )
+        predictions["MVP rank"] = predictions["PRED_RANK"]
+        show_columns = ["MVP probability", "MVP rank"] + initial_columns[:]
+        predictions = predictions[show_columns]
 
-    navigation_page = st.sidebar.radio(
-        "Navigate to", [PAGE_PREDICTIONS, PAGE_EXPLANATIONS, PAGE_PERFORMANCE]
-    )
-    st.sidebar.markdown(sidebar.sidebar_top_text)
-    # st.sidebar.markdown(sidebar.sidebar_bottom_text)
+        top_3 = predictions["MVP probability"].head(3).to_dict()
+        emojis = ["🥇", "🥈", "🥉"]
 
-    initial_columns = list(predictions.columns)
-    st.header(str(navigation_page))
+        for n, player_name in enumerate(top_3):
+            title_level = "###" + n * "#"
+            col1.markdown(
+                f"""
+                    ##### {emojis[n]} **{player_name}**
+                    *{top_3[player_name]} probability to win MVP*
+                    """
+            )
 
-    if navigation_page == PAGE_PREDICTIONS:
+        show_top_n = compute_probs_based_on_top_n
+        # show_top_n = min([compute_probs_based_on_top_n, 10])
 
-        if building_predictions_succeeded:
+        st.subheader(f"Predicted top {show_top_n}")
 
-            col1, col2 = st.columns(2)
-            col1.subheader("Predicted top 3")
-            col2.subheader("Prediction parameters")
-            confidence_mode = col2.radio(
-                "Method used to estimate MVP probability",
-                [CONFIDENCE_MODE_SHARE, CONFIDENCE_MODE_SOFTMAX],
-            )
-            compute_probs_based_on_top_n = col2.slider(
-                "Number of players used to estimate probability",
-                min_value=3,
-                max_value=10,
-                value=10,
-                step=1,
-                format="%d players",
-            )
-            if confidence_mode == CONFIDENCE_MODE_SOFTMAX:
-                predictions.loc[
-                    predictions.PRED_RANK <= compute_probs_based_on_top_n,
-                    "MVP probability",
-                ] = (
-                        evaluate.softmax(
-                            predictions[
-                                predictions.PRED_RANK <= compute_probs_based_on_top_n
-                                ]["PRED"]
-                        )
-                        * 100
-                )
-            else:
-                predictions.loc[
-                    predictions.PRED_RANK <= compute_probs_based_on_top_n,
-                    "MVP probability",
-                ] = (
-                        evaluate.share(
-                            predictions[
-                                predictions.PRED_RANK <= compute_probs_based_on_top_n
-                                ]["PRED"]
-                        )
-                        * 100
-                )
-            predictions.loc[
-                predictions.PRED_RANK > compute_probs_based_on_top_n, "MVP probability"
-            ] = 0.0
-            predictions["MVP probability"] = predictions["MVP probability"].map(
-                "{:,.2f}%".format
-            )
-            predictions["MVP rank"] = predictions["PRED_RANK"]
-            show_columns = ["MVP probability", "MVP rank"] + initial_columns[:]
-            predictions = predictions[show_columns]
-
-            top_3 = predictions["MVP probability"].head(3).to_dict()
-            emojis = ["🥇", "🥈", "🥉"]
-
-            for n, player_name in enumerate(top_3):
-                title_level = "###" + n * "#"
-                col1.markdown(
-                    f"""
-                        ##### {emojis[n]} **{player_name}**
-                        *{top_3[player_name]} probability to win MVP*
-                        """
-                )
-
-            show_top_n = compute_probs_based_on_top_n
-            # show_top_n = min([compute_probs_based_on_top_n, 10])
-
-            st.subheader(f"Predicted top {show_top_n}")
-
-            col1, col2 = st.columns(2)
-            # col2.markdown("Player statistics")
-            cols = [
-                col
-                for col in predictions.columns
-                if "MVP" not in col and "PRED" not in col
-            ]
-            col2.dataframe(
-                data=predictions.head(show_top_n)[cols],
-                width=None,
-                height=300,
-            )
+        col1, col2 = st.columns(2)
+        # col2.markdown("Player statistics")
+        cols = [
+            col
+            for col in predictions.columns
+            if "MVP" not in col and "PRED" not in col
+        ]
+        col2.dataframe(
+            data=predictions.head(show_top_n)[cols],
+            width=None,
+            height=300,
+        )
 
-            predictions["player"] = predictions.index
-            predictions["chance"] = predictions["MVP probability"].str[:-1]
-            predictions["chance"] = pandas.to_numeric(predictions["chance"])
-
-            # col1.markdown("Chart")
-            col1.vega_lite_chart(
-                predictions.head(show_top_n),
-                {
-                    "mark": {
-                        "type": "bar",
-                        "point": True,
-                        "tooltip": True,
+        predictions["player"] = predictions.index
+        predictions["chance"] = predictions["MVP probability"].str[:-1]
+        predictions["chance"] = pandas.to_numeric(predictions["chance"])
+
+        # col1.markdown("Chart")
+        col1.vega_lite_chart(
+            predictions.head(show_top_n),
+            {
+                "mark": {
+                    "type": "bar",
+                    "point": True,
+                    "tooltip": True,
+                },
+                "encoding": {
+                    "x": {
+                        "field": "chance",
+                        "type": "quantitative",
+                        "title": " MVP probability (%)",
                     },
-                    "encoding": {
-                        "x": {
-                            "field": "chance",
-                            "type": "quantitative",
-                            "title": " MVP probability (%)",
-                        },
-                        "y": {
-                            "field": "player",
-                            "type": "nominal",
-                            "title": None,
-                            "sort": "-x",
-                        },
-                        "color": {
-                            "field": "chance",
-                            "type": "quantitative",
-                            "title": None,
-                            "legend": None,
-                            "scale": {"scheme": "purplebluegreen"},
-                        },
+                    "y": {
+                        "field": "player",
+                        "type": "nominal",
+                        "title": None,
+                        "sort": "-x",
+                    },
+                    "color": {
+                        "field": "chance",
+                        "type": "quantitative",
+                        "title": None,
+                        "legend": None,
+                        "scale": {"scheme": "purplebluegreen"},
                     },
                 },
-                height=350,
-                use_container_width=True,
-            )
+            },
+            height=350,
+            use_container_width=True,
+        )
 
-        else:
-            st.warning(
-                "This section is unavailable because loading predictions file failed."
-            )
+    else:
+        st.warning(
+            "This section is unavailable because loading predictions file failed."
+        )
 
-        st.subheader("Predictions history")
+    st.subheader("Predictions history")
 
-        if building_history_succeeded:
+    if history is not None:
 
-            col1, col2, col3 = st.columns([2, 3, 3])
-            keep_top_n = col2.slider(
-                "Number of players to show",
-                min_value=3,
-                max_value=compute_probs_based_on_top_n,
-                value=5,
+        col1, col2, col3 = st.columns([2, 3, 3])
+        keep_top_n = col2.slider(
+            "Number of players to show",
+            min_value=3,
+            max_value=compute_probs_based_on_top_n,
+            value=5,
+            step=1,
+            format="%d players",
+        )
+        variable_to_draw_dict = {
+            "MVP probability (%)": "chance",
+            "Predicted MVP share": "prediction",
+        }
+        variable_to_draw = col1.radio(
+            "Variable to draw", list(variable_to_draw_dict.keys())
+        )
+        slider_min_value = max(int(history.days_ago.min()), 3)
+        slider_max_value = int(history.days_ago.max())
+        if slider_min_value < slider_max_value:
+            num_past_days = col3.slider(
+                "Show history for last",
+                min_value=slider_min_value,
+                max_value=slider_max_value,
+                value=min(int(history.days_ago.max()), 30),
                 step=1,
-                format="%d players",
-            )
-            variable_to_draw_dict = {
-                "MVP probability (%)": "chance",
-                "Predicted MVP share": "prediction",
-            }
-            variable_to_draw = col1.radio(
-                "Variable to draw", list(variable_to_draw_dict.keys())
+                format="%d days",
             )
-            slider_min_value = max(int(history.days_ago.min()), 3)
-            slider_max_value = int(history.days_ago.max())
-            if slider_min_value < slider_max_value:
-                num_past_days = col3.slider(
-                    "Show history for last",
-                    min_value=slider_min_value,
-                    max_value=slider_max_value,
-                    value=min(int(history.days_ago.max()), 30),
-                    step=1,
-                    format="%d days",
-                )
-            else:
-                logger.warning("Could not build history range slider")
-                num_past_days = 1
-
-            prepared_history = prepare_history(
-                history,
-                keep_top_n,
-                confidence_mode,
-                compute_probs_based_on_top_n,
-                keep_last_days=num_past_days,
-            )
-            st.vega_lite_chart(
-                prepared_history,
-                {
-                    "mark": {
-                        "type": "line",
-                        "interpolate": "monotone",
-                        "point": True,
-                        "tooltip": True,
+        else:
+            logger.warning("Could not build history range slider")
+            num_past_days = 1
+
+        prepared_history = prepare_history(
+            history,
+            keep_top_n,
+            confidence_mode,
+            compute_probs_based_on_top_n,
+            keep_last_days=num_past_days,
+            history_version=get_history_version(history),
+        )
+        st.vega_lite_chart(
+            prepared_history,
+            {
+                "mark": {
+                    "type": "line",
+                    "interpolate": "monotone",
+                    "point": True,
+                    "tooltip": True,
+                },
+                "encoding": {
+                    "x": {
+                        "timeUnit": "yearmonthdate",
+                        "field": "date",
+                        "title": "Date",
                     },
-                    "encoding": {
-                        "x": {
-                            "timeUnit": "yearmonthdate",
-                            "field": "date",
-                            "title": "Date",
-                        },
-                        "y": {
-                            "field": variable_to_draw_dict[variable_to_draw],
-                            "type": "quantitative",
-                            "title": variable_to_draw,
-                        },
-                        "color": {
-                            "field": "player",
-                            "type": "nominal",
-                            "scale": {"scheme": "category20"},
-                            "legend": {
-                                "orient": "bottom-left",
-                                "fillColor": "#525050"
-                            },
+                    "y": {
+                        "field": variable_to_draw_dict[variable_to_draw],
+                        "type": "quantitative",
+                        "title": variable_to_draw,
+                    },
+                    "color": {
+                        "field": "player",
+                        "type": "nominal",
+                        "scale": {"scheme": "category20"},
+                        "legend": {
+                            "orient": "bottom-left",
+                            "fillColor": "#525050"
                         },
                     },
                 },
-                height=400,
-                use_container_width=True,
-            )
+            },
+            height=400,
+            use_container_width=True,
+        )
 
-        else:
-            st.warning(
-                "This section is unavailable because loading history file failed."
-            )
+    else:
+        st.warning(
+            "This section is unavailable because loading history file failed."
+        )
 
-    elif navigation_page == PAGE_PERFORMANCE:
 
-        if building_performances_succeeded:
+def show_explanations_page():
+    shap_summary = load_page_data(build_shap_values, "shap values")
 
-            col1, col2 = st.columns(2)
-            # col1
-            percentage = mvp_found_pct(performances)
-            num_test_seasons = len(performances)
-            avg_real_rank = avg_real_mvp_rank(performances)
-            avg_pred_rank = avg_pred_mvp_rank(performances)
+    if shap_summary is not None:
 
-            col1.markdown(
-                f"##### All {num_test_seasons} seasons ({performances.index.min()}-{performances.index.max()})"
-            )
-            col1.markdown(
+        st.subheader("Local explanation")
+        st.markdown(
+            "To understand which stats have the strongest impact on the model prediction for the MVP share one player."
+        )
+        predictions = load_page_data(build_predictions, "predictions")
+        if predictions is not None:
+            players = predictions.index.to_list()[:10]
+        else:
+            players = list(shap_summary["drivers"])[:10]
+        selected_player = st.selectbox(
+            "Select a player", players
+        )
+        player_drivers = shap_summary["drivers"].get(selected_player)
+        if player_drivers is None:
+            st.warning("No explanation is available for this player yet.")
+            player_drivers = {"positive": [], "negative": []}
+
+        st.markdown(
+            "👍 Stats with the strongest **positive impact** on the model prediction for this player:"
+        )
+        for col, (feature, impact) in zip(st.columns(EXPLANATION_TOP_K), player_drivers["positive"]):
+            col.success(
                 f"""
-                    - **{percentage}** of MVPs correctly found
-                    - The true MVP is ranked **{avg_real_rank}** by the model in average
-                    - The true rank of the predicted MVP is **{avg_pred_rank}** in average
-                    """
-            )
-            # col2
-            performances_last10 = performances.head(10)
-            percentage = mvp_found_pct(performances_last10)
-            num_test_seasons = len(performances_last10)
-            avg_real_rank = avg_real_mvp_rank(performances_last10)
-            avg_pred_rank = avg_pred_mvp_rank(performances_last10)
-            col2.markdown(
-                f"##### Last {num_test_seasons} seasons ({performances_last10.index.min()}-{performances_last10.index.max()})"
+                        **{feature}**   
+                        *+{round(impact, 2)} MVP share*
+                        """
             )
-            col2.markdown(
+        st.markdown(
+            "👎 Stats with the strongest **negative impact** on the model prediction for this player:"
+        )
+        for col, (feature, impact) in zip(st.columns(EXPLANATION_TOP_K), player_drivers["negative"]):
+            col.error(
                 f"""
-                    - **{percentage}** of MVPs correctly found
-                    - The true MVP is ranked **{avg_real_rank}** by the model in average
-                    - The true rank of the predicted MVP is **{avg_pred_rank}** in average
-                    """
-            )
-
-            st.dataframe(data=performances, width=None, height=None)
-            st.markdown(
-                """
-            Predictions of the model are made on the unseen season using holdout method.
-            Players with no MVP vote are considered as ranked 10th for simplification.
-            """
-            )
-
-        else:
-            st.warning(
-                "This page is unavailable because loading perfomances file failed."
+                        **{feature}**    
+                        *{round(impact, 2)} MVP share*
+                        """
             )
 
-    elif navigation_page == PAGE_EXPLANATIONS:
-
-        if building_shap_values_succeeded:
-
-            # Remove binary features - should no be trusted for SHAP
-            shap_values = shap_values[
-                [
-                    f
-                    for f in shap_values.columns
-                    if "ERN_CONF" not in f and "POS_" not in f
-                ]
-            ]
-            # Rename _advanced features - they are unique anyway
-            mapping = {
-                f: remove_trailing_sequence(f, "_advanced") for f in shap_values.columns
-            }
-            shap_values = shap_values.rename(columns=mapping)
-
-            st.subheader("Local explanation")
-            st.markdown(
-                "To understand which stats have the strongest impact on the model prediction for the MVP share one player."
-            )
-            selected_player = st.selectbox(
-                "Select a player", predictions.index.to_list()[:10]
-            )
-            a = shap_values.loc[selected_player, :]
-            features_positive_impact = a[a > 0.0]
-            features_negative_impact = a[a < 0.0]
-
-            num_stats = 3
-            top_features_positive_impact = (
-                features_positive_impact.sort_values(ascending=False)
-                    .index[:num_stats]
-                    .to_list()
-            )
-            top_features_positive_impact_values = features_positive_impact.sort_values(
-                ascending=False
-            ).values[:num_stats]
-            top_features_negative_impact = (
-                features_negative_impact.sort_values(ascending=True)
-                    .index[:num_stats]
-                    .to_list()
-            )
-            top_features_negative_impact_values = features_negative_impact.sort_values(
-                ascending=True
-            ).values[:num_stats]
+        st.subheader("Global explanation")
+        st.markdown(
+            "To understand which stats have an impact on the model prediction for the MVP share of the top candidates."
+        )
+        shap_importance = shap_summary["importance"]
 
-            st.markdown(
-                "👍 Stats with the strongest **positive impact** on the model prediction for this player:"
-            )
-            for i, col in enumerate(st.columns(num_stats)):
-                col.success(
-                    f"""
-                            **{(top_features_positive_impact[i])}**   
-                            *+{round(top_features_positive_impact_values[i], 2)} MVP share*
-                            """
-                )
-            st.markdown(
-                "👎 Stats with the strongest **negative impact** on the model prediction for this player:"
-            )
-            for i, col in enumerate(st.columns(num_stats)):
-                col.error(
-                    f"""
-                            **{top_features_negative_impact[i]}**    
-                            *{round(top_features_negative_impact_values[i], 2)} MVP share*
-                            """
-                )
-
-            st.subheader("Global explanation")
-            st.markdown(
-                "To understand which stats have an impact on the model prediction for the MVP share of the top-10 players."
-            )
-            # vals = numpy.abs(shap_values.values).mean(0)
-            vals = numpy.array(shap_values.values).mean(0)
-            vals_abs = numpy.abs(shap_values.values).mean(0)
-            shap_importance = pandas.DataFrame(
-                list(zip(shap_values.columns, vals, vals_abs)),
-                columns=[
-                    "col_name",
-                    "feature_importance_vals",
-                    "abs_feature_importance_vals",
-                ],
-            )
+        col1, col2 = st.columns([10, 9])
 
-            col1, col2 = st.columns([10, 9])
+        shap_importance = shap_importance.sort_values(
+            by=["feature_importance_vals"], ascending=True
+        )
+        col1.markdown("**Average impact on the predicted MVP share**")
+        col1.vega_lite_chart(
+            shap_importance,
+            {
+                "mark": {
+                    "type": "bar",
+                    "point": True,
+                    "tooltip": True,
+                },
+                "title": {"text": None},  # "Average impact on the prediction"
+                "encoding": {
+                    "x": {
+                        "field": "feature_importance_vals",
+                        "type": "quantitative",
+                        "title": "Average impact (MVP share)",
+                    },
+                    "y": {
+                        "field": "col_name",
+                        "type": "nominal",
+                        "title": "Statistics",
+                        "sort": "-x",
+                    },
+                    "color": {
+                        "field": "feature_importance_vals",
+                        "type": "quantitative",
+                        "title": None,
+                        "legend": None,
+                        "scale": {"scheme": "redyellowgreen"},
+                    },
+                },
+            },
+            height=700,
+            use_container_width=True,
+        )
 
-            shap_importance = shap_importance.sort_values(
-                by=["feature_importance_vals"], ascending=True
-            )
-            col1.markdown("**Average impact on the predicted MVP share**")
-            col1.vega_lite_chart(
-                shap_importance,
-                {
-                    "mark": {
-                        "type": "bar",
-                        "point": True,
-                        "tooltip": True,
+        shap_importance = shap_importance.sort_values(
+            by=["abs_feature_importance_vals"], ascending=True
+        )
+        col2.markdown("**Average absolute impact (positive or negative)**")
+        col2.vega_lite_chart(
+            shap_importance,
+            {
+                "mark": {
+                    "type": "bar",
+                    "point": True,
+                    "tooltip": True,
+                },
+                "title": {"text": None},  # "Average absolute impact"
+                "encoding": {
+                    "x": {
+                        "field": "abs_feature_importance_vals",
+                        "type": "quantitative",
+                        "title": "Average absolute impact (MVP share)",
                     },
-                    "title": {"text": None},  # "Average impact on the prediction"
-                    "encoding": {
-                        "x": {
-                            "field": "feature_importance_vals",
-                            "type": "quantitative",
-                            "title": "Average impact (MVP share)",
-                        },
-                        "y": {
-                            "field": "col_name",
-                            "type": "nominal",
-                            "title": "Statistics",
-                            "sort": "-x",
-                        },
-                        "color": {
-                            "field": "feature_importance_vals",
-                            "type": "quantitative",
-                            "title": None,
-                            "legend": None,
-                            "scale": {"scheme": "redyellowgreen"},
-                        },
+                    "y": {
+                        "field": "col_name",
+                        "type": "nominal",
+                        "title": None,
+                        "sort": "-x",
+                    },
+                    "color": {
+                        "field": "abs_feature_importance_vals",
+                        "type": "quantitative",
+                        "title": None,
+                        "legend": None,
+                        "scale": {"scheme": "purplebluegreen"},
                     },
                 },
-                height=700,
-                use_container_width=True,
-            )
+            },
+            height=700,
+            use_container_width=True,
+        )
 
-            shap_importance = shap_importance.sort_values(
-                by=["abs_feature_importance_vals"], ascending=True
-            )
-            col2.markdown("**Average absolute impact (positive or negative)**")
-            col2.vega_lite_chart(
-                shap_importance,
-                {
-                    "mark": {
-                        "type": "bar",
-                        "point": True,
-                        "tooltip": True,
+    else:
+        st.warning(
+            "This page is unavailable because loading explainability file failed."
+        )
+
+
+def show_explanations_history_page():
+    try:
+        explanations_history = build_shap_history()
+        history_dates = explanations_history.dates()
+    except (OSError, Exception) as e:
+        logger.error(f"Failed to build SHAP history {e}", exc_info=False)
+        history_dates = []
+
+    if len(history_dates) >= 2:
+        st.markdown(
+            "To see which stats changed the most the model prediction for the MVP share of players over a period."
+        )
+        col1, col2, col3 = st.columns([3, 3, 2])
+        since_date = col1.select_slider(
+            "Changes since",
+            options=history_dates[:-1],
+            value=history_dates[max(0, len(history_dates) - 8)],
+        )
+        last_players = explanations_history.read_day(history_dates[-1]).index.unique().to_list()
+        selected_player = col2.selectbox("Player", ["All players"] + last_players)
+        show_top_n = col3.slider(
+            "Number of changes to show",
+            min_value=5,
+            max_value=30,
+            value=10,
+            step=1,
+        )
+        movers = explanations_history.top_movers(
+            since_date,
+            n=None,
+            players=None if selected_player == "All players" else [selected_player],
+        )
+        # Binary features should not be trusted for SHAP
+        movers = movers[
+            ~movers.FEATURE.str.contains("ERN_CONF") & ~movers.FEATURE.str.contains("POS_")
+        ].head(show_top_n)
+        movers["FEATURE"] = movers["FEATURE"].map(
+            lambda f: remove_trailing_sequence(f, "_advanced")
+        )
+        movers["change"] = movers["PLAYER"] + " - " + movers["FEATURE"]
+        st.vega_lite_chart(
+            movers,
+            {
+                "mark": {
+                    "type": "bar",
+                    "point": True,
+                    "tooltip": True,
+                },
+                "encoding": {
+                    "x": {
+                        "field": "DELTA",
+                        "type": "quantitative",
+                        "title": f"Change of impact since {since_date} (MVP share)",
                     },
-                    "title": {"text": None},  # "Average absolute impact"
-                    "encoding": {
-                        "x": {
-                            "field": "abs_feature_importance_vals",
-                            "type": "quantitative",
-                            "title": "Average absolute impact (MVP share)",
-                        },
-                        "y": {
-                            "field": "col_name",
-                            "type": "nominal",
-                            "title": None,
-                            "sort": "-x",
-                        },
-                        "color": {
-                            "field": "abs_feature_importance_vals",
-                            "type": "quantitative",
-                            "title": None,
-                            "legend": None,
-                            "scale": {"scheme": "purplebluegreen"},
-                        },
+                    "y": {
+                        "field": "change",
+                        "type": "nominal",
+                        "title": None,
+                        "sort": "-x",
+                    },
+                    "color": {
+                        "field": "DELTA",
+                        "type": "quantitative",
+                        "title": None,
+                        "legend": None,
+                        "scale": {"scheme": "redyellowgreen"},
                     },
                 },
-                height=700,
-                use_container_width=True,
-            )
+            },
+            height=400,
+            use_container_width=True,
+        )
+        st.dataframe(
+            data=movers[["PLAYER", "FEATURE", "START", "END", "DELTA"]].rename(
+                columns={
+                    "PLAYER": "Player",
+                    "FEATURE": "Statistic",
+                    "START": f"Impact on {since_date}",
+                    "END": f"Impact on {history_dates[-1]}",
+                    "DELTA": "Change",
+                }
+            ),
+            width=None,
+            height=None,
+        )
 
-        else:
-            st.warning(
-                "This page is unavailable because loading explainability file failed."
-            )
+    else:
+        st.warning(
+            "This page is unavailable until explanations of two days are available."
+        )
+
+
+def show_performance_page():
+    performances = load_page_data(build_performances, "performances")
+
+    if performances is not None:
+
+        col1, col2 = st.columns(2)
+        # col1
+        percentage = mvp_found_pct(performances)
+        num_test_seasons = len(performances)
+        avg_real_rank = avg_real_mvp_rank(performances)
+        avg_pred_rank = avg_pred_mvp_rank(performances)
+
+        col1.markdown(
+            f"##### All {num_test_seasons} seasons ({performances.index.min()}-{performances.index.max()})"
+        )
+        col1.markdown(
+            f"""
+                - **{percentage}** of MVPs correctly found
+                - The true MVP is ranked **{avg_real_rank}** by the model in average
+                - The true rank of the predicted MVP is **{avg_pred_rank}** in average
+                """
+        )
+        # col2
+        performances_last10 = performances.head(10)
+        percentage = mvp_found_pct(performances_last10)
+        num_test_seasons = len(performances_last10)
+        avg_real_rank = avg_real_mvp_rank(performances_last10)
+        avg_pred_rank = avg_pred_mvp_rank(performances_last10)
+        col2.markdown(
+            f"##### Last {num_test_seasons} seasons ({performances_last10.index.min()}-{performances_last10.index.max()})"
+        )
+        col2.markdown(
+            f"""
+                - **{percentage}** of MVPs correctly found
+                - The true MVP is ranked **{avg_real_rank}** by the model in average
+                - The true rank of the predicted MVP is **{avg_pred_rank}** in average
+                """
+        )
+
+        st.dataframe(data=performances, width=None, height=None)
+        st.markdown(
+            """
+        Predictions of the model are made on the unseen season using holdout method.
+        Players with no MVP vote are considered as ranked 10th for simplification.
+        """
+        )
+
+    else:
+        st.warning(
+            "This page is unavailable because loading perfomances file failed."
+        )
+
+
+def run():
+    start = time.perf_counter()
+    st.set_page_config(
+        page_title="NBA season MVP predictor",
+        page_icon=":basketball:",
+        layout="wide",
+        initial_sidebar_state="auto"
+    )
+    # Pages only load the artifacts they show, the others are downloaded meanwhile
+    try:
+        artifact_cache.get_artifact_cache().prefetch(ARTIFACT_PARSERS)
+    except (OSError, Exception) as e:
+        logger.error(f"Failed to prefetch artifacts {e}", exc_info=False)
+    st.title("NBA season MVP Predict🏀r")
+    local_css("application/css/custom.css")
+    current_season = (
+        datetime.now().year + 1 if datetime.now().month > 9 else datetime.now().year
+    )
+    st.markdown(
+        f"""
+    *Predicting the NBA Most Valuable Player for the {current_season - 1}-{str(current_season)[-2:]} season using machine learning.*
+    *Last update : {get_last_update()}.*
+    """
+    )
+
+    st.sidebar.image("application/utils/nba-logo.png", use_column_width=True)
+
+    pages = {
+        PAGE_PREDICTIONS: show_predictions_page,
+        PAGE_EXPLANATIONS: show_explanations_page,
+        PAGE_EXPLANATIONS_HISTORY: show_explanations_history_page,
+        PAGE_PERFORMANCE: show_performance_page,
+    }
+    navigation_page = st.sidebar.radio("Navigate to", list(pages))
+    st.sidebar.markdown(sidebar.sidebar_top_text)
+    # st.sidebar.markdown(sidebar.sidebar_bottom_text)
+
+    st.header(str(navigation_page))
+    pages[navigation_page]()
 
+    elapsed = time.perf_counter() - start
+    if st.session_state.get("first_paint_logged"):
+        logger.debug(f"Page '{navigation_page}' rendered in {elapsed:.2f}s")
     else:
-        st.error("Unknown page selected.")
+        st.session_state["first_paint_logged"] = True
+        logger.info(f"First paint of page '{navigation_page}' in {elapsed:.2f}s")
@@ -0,0 +1,55 @@
+"""
+Benchmark of the inter-correlation pruning of training features.
+
+Compares analyze.get_columns_with_inter_correlations_under with the previous
+implementation, which recomputed the correlation matrix after each dropped column,
+on the numerical features of the silver dataset.
+
+Run from the repository root, once silver data has been built:
+    python -m benchmarks.correlation_pruning
+"""
+import contextlib
+import io
+import timeit
+
+from application.data_preprocess import get_numerical_columns
+from application.model import train
+from application.utils import analyze, load
+
+
+def legacy_get_columns_with_inter_correlations_under(dataframe, threshold):
+    """Previous implementation: full correlation matrix recomputed after each drop."""
+    data_copy = dataframe.copy()
+    high_correlation_pairs = analyze.get_column_pairs_correlation_above_threshold(data_copy, threshold)
+    while high_correlation_pairs:
+        data_copy.drop(high_correlation_pairs[0][1], axis="columns", inplace=True)
+        high_correlation_pairs = analyze.get_column_pairs_correlation_above_threshold(data_copy, threshold)
+    return data_copy.columns
+
+
+def run(repeat=3):
+    data = load.load_silver_data()
+    features = [col for col in data.columns if col not in train._NOT_FEATURES]
+    num_data = data[get_numerical_columns(data[features])]
+    threshold = train._MAX_FEATURES_CORRELATION
+    print(f"{len(num_data)} rows, {len(num_data.columns)} numerical features, threshold {threshold}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_columns = legacy_get_columns_with_inter_correlations_under(num_data, threshold)
+        columns = analyze.get_columns_with_inter_correlations_under(num_data, threshold)
+        legacy_time = min(timeit.repeat(
+            lambda: legacy_get_columns_with_inter_correlations_under(num_data, threshold),
+            number=1, repeat=repeat
+        ))
+        new_time = min(timeit.repeat(
+            lambda: analyze.get_columns_with_inter_correlations_under(num_data, threshold),
+            number=1, repeat=repeat
+        ))
+
+    print(f"Kept columns: {len(columns)} (legacy: {len(legacy_columns)})")
+    print(f"Same columns as legacy: {sorted(columns) == sorted(legacy_columns)}")
+    print(f"Legacy: {legacy_time:.3f}s - single pass: {new_time:.3f}s - speedup x{legacy_time / new_time:.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,56 @@
+"""
+Benchmark of the warm-started training of the model (train --incremental).
+
+Simulates the arrival of a new season on the gold dataset: a model is trained on
+every season but the last one, then updated with the last season either by a full
+training from scratch or by continuing from its weights.
+
+Run from the repository root, once a model has been trained:
+    python -m benchmarks.incremental_training
+"""
+import copy
+import timeit
+
+from sklearn import base, metrics
+
+from application import conf
+from application.model import incremental
+from application.utils import load, util_functions
+
+
+def run(repeat=3):
+    features = load.load_features()["model"]
+    data = load.load_gold_data()
+    data = data[data.SEASON < util_functions.get_current_season()]
+    last_season = data.SEASON.max()
+    previous = data[data.SEASON < last_season]
+    X, y = data[features], data["MVP_VOTES_SHARE"]
+    print(f"{len(data)} rows, {len(features)} features, new season {last_season}")
+
+    regressor = base.clone(load.load_model())
+    previous_model = base.clone(regressor).fit(previous[features], previous["MVP_VOTES_SHARE"])
+
+    def full_training():
+        return base.clone(regressor).fit(X, y)
+
+    def warm_started_training():
+        model = copy.deepcopy(previous_model)
+        converged, epochs = incremental.continue_training(
+            model, X, y, max_epochs=conf.train.incremental.max_epochs
+        )
+        return model, converged, epochs
+
+    full_model = full_training()
+    warm_model, converged, epochs = warm_started_training()
+    full_time = min(timeit.repeat(full_training, number=1, repeat=repeat))
+    warm_time = min(timeit.repeat(warm_started_training, number=1, repeat=repeat))
+
+    print(f"Full training: {full_model.n_iter_} epochs, loss {full_model.loss_:.6f}, "
+          f"MAE {metrics.mean_absolute_error(y, full_model.predict(X)):.5f}, {full_time:.3f}s")
+    print(f"Warm-started: {epochs} epochs (converged: {converged}), loss {warm_model.loss_:.6f}, "
+          f"MAE {metrics.mean_absolute_error(y, warm_model.predict(X)):.5f}, {warm_time:.3f}s")
+    print(f"Speedup x{full_time / warm_time:.1f}")
+
+
+if __name__ == "__main__":
+    run()